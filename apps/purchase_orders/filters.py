@@ -0,0 +1,92 @@
+from django import forms
+from django_filters import rest_framework as filters
+from rest_framework.filters import OrderingFilter, SearchFilter
+
+from apps.utils.base import AbstractBaseViewSet
+from apps.utils.enums import POStatusEnum
+
+from .models import PurchaseOrder
+from .search import search_purchase_orders
+
+
+class ISODateTimeBoundField(forms.Field):
+    """
+    Accepts an ISO 8601 date or datetime. A plain date stands for the start
+    of the day, or its last instant for an upper bound.
+    """
+
+    def __init__(self, *args, end_of_day=False, **kwargs):
+        self.end_of_day = end_of_day
+        super().__init__(*args, **kwargs)
+
+    def to_python(self, value):
+        try:
+            return AbstractBaseViewSet.parse_date_param(value, end_of_day=self.end_of_day)
+        except Exception as ex:
+            raise forms.ValidationError(str(ex))
+
+
+class ISODateTimeBoundFilter(filters.Filter):
+    """
+    Compares the column itself against the bound, so range filters stay
+    index range scans.
+    """
+
+    field_class = ISODateTimeBoundField
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("end_of_day", kwargs.get("lookup_expr") == "lte")
+        super().__init__(*args, **kwargs)
+
+
+class CharInFilter(filters.BaseInFilter, filters.CharFilter):
+    pass
+
+
+class StableOrderingFilter(filters.OrderingFilter):
+    """
+    Ordering with the primary key as a tiebreaker so pages never overlap.
+    """
+
+    def filter(self, qs, value):
+        qs = super().filter(qs, value)
+        if value:
+            qs = qs.order_by(*qs.query.order_by, "-pk")
+        return qs
+
+
+class PurchaseOrderSearchFilter(SearchFilter):
+    """
+    Matches `?search=` through the purchase order full-text index, ranked
+    unless the request asks for an ordering.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        return search_purchase_orders(
+            queryset,
+            request.query_params.get(self.search_param, ""),
+            ranked=OrderingFilter.ordering_param not in request.query_params,
+        )
+
+
+class PurchaseOrderFilter(filters.FilterSet):
+    vendor_id = filters.UUIDFilter(field_name="vendor_id")
+    buyer_id = filters.UUIDFilter(field_name="buyer_id")
+    order_date_from = ISODateTimeBoundFilter(field_name="order_date", lookup_expr="gte")
+    order_date_to = ISODateTimeBoundFilter(field_name="order_date", lookup_expr="lte")
+    delivery_date_from = ISODateTimeBoundFilter(field_name="delivery_date", lookup_expr="gte")
+    delivery_date_to = ISODateTimeBoundFilter(field_name="delivery_date", lookup_expr="lte")
+    acknowledgment_date_from = ISODateTimeBoundFilter(field_name="acknowledgment_date", lookup_expr="gte")
+    acknowledgment_date_to = ISODateTimeBoundFilter(field_name="acknowledgment_date", lookup_expr="lte")
+    status = filters.ChoiceFilter(choices=POStatusEnum.choices())
+    status__in = CharInFilter(field_name="status", lookup_expr="in")
+    ordering = StableOrderingFilter(
+        fields=("order_date", "delivery_date", "acknowledgment_date", "quality_rating", "po_number")
+    )
+
+    class Meta:
+        model = PurchaseOrder
+        fields = {
+            "po_number": ["exact"],
+            "quality_rating": ["exact", "gte", "lte"],
+        }
@@ -0,0 +1,127 @@
+import statistics
+import time
+
+from django.contrib.auth.models import Group
+from django.core.management.base import BaseCommand
+from django.db import connection, reset_queries
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.users.models import BuyerSettings, User, VendorProfile
+from apps.utils.benchmark import rolled_back, seed_purchase_orders
+from apps.utils.enums import UserGroup
+
+# (role of the requesting user, list endpoint)
+LIST_ENDPOINTS = (
+    (UserGroup.VENDOR, "/api/v1/purchase_orders/"),
+    (UserGroup.VENDOR, "/api/v1/vendors/purchase-order/"),
+    (UserGroup.BUYER, "/api/v1/purchase_orders/"),
+    (UserGroup.BUYER, "/api/v1/buyers/purchase-order/"),
+)
+
+# plan fragments of a full table scan on SQLite and PostgreSQL
+FULL_SCAN_MARKERS = ("SCAN purchase_order\n", "Seq Scan on purchase_order")
+
+
+class Command(BaseCommand):
+    help = (
+        "Prints the query plans and timings of the purchase order list endpoints "
+        "on synthetic purchase orders, which are rolled back afterwards"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            nargs="+",
+            default=[100000, 1000000],
+            help="Number of synthetic purchase orders of each run",
+        )
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=100,
+            help="Number of synthetic vendors and of synthetic buyers",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Number of timed requests per endpoint",
+        )
+
+    def handle(self, *args, **options):
+        full_scans = 0
+        for rows in options["rows"]:
+            with rolled_back():
+                full_scans += self.run(rows, options["users"], options["repeat"])
+        if full_scans:
+            self.stdout.write(self.style.ERROR(f"{full_scans} query plan(s) scan the whole purchase_order table"))
+        else:
+            self.stdout.write(self.style.SUCCESS("No list endpoint scans the whole purchase_order table"))
+
+    def run(self, rows, user_count, repeat):
+        self.stdout.write(f"Seeding {rows} purchase order(s) over {user_count} vendor(s) and buyer(s)")
+        users = {
+            UserGroup.VENDOR: self.seed_users(UserGroup.VENDOR, user_count),
+            UserGroup.BUYER: self.seed_users(UserGroup.BUYER, user_count),
+        }
+        VendorProfile.objects.bulk_create(
+            VendorProfile(user=user, business_name=f"Benchmark vendor {user.username}")
+            for user in users[UserGroup.VENDOR]
+        )
+        BuyerSettings.objects.bulk_create(
+            BuyerSettings(user=user, business_name=f"Benchmark buyer {user.username}")
+            for user in users[UserGroup.BUYER]
+        )
+        seed_purchase_orders(
+            rows,
+            vendor_ids=list(VendorProfile.objects.filter(user__in=users[UserGroup.VENDOR]).values_list("id", flat=True)),
+            buyer_ids=[user.id for user in users[UserGroup.BUYER]],
+        )
+
+        full_scans = 0
+        client = APIClient()
+        for role, endpoint in LIST_ENDPOINTS:
+            client.force_authenticate(users[role][0])
+            # a full query log stops growing and would hide the captured queries
+            reset_queries()
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(endpoint)
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                client.get(endpoint)
+                timings.append(time.perf_counter() - started)
+
+            self.stdout.write(
+                f"\n{rows} rows, {role} GET {endpoint}: HTTP {response.status_code}, "
+                f"median {statistics.median(timings) * 1000:.1f}ms over {repeat} request(s)"
+            )
+            for query in context.captured_queries:
+                if '"purchase_order"' not in query["sql"]:
+                    continue
+                plan = self.explain(query["sql"])
+                self.stdout.write(f"  {query['sql']}\n{plan}")
+                if any(marker in plan + "\n" for marker in FULL_SCAN_MARKERS):
+                    full_scans += 1
+                    self.stdout.write(self.style.WARNING("  ^ full scan of purchase_order"))
+        return full_scans
+
+    @staticmethod
+    def seed_users(group_name, count):
+        users = User.objects.bulk_create(
+            User(username=f"bench-{group_name}-{number}", mobile=f"bench-{group_name}-{number}")
+            for number in range(count)
+        )
+        group, _ = Group.objects.get_or_create(name=group_name)
+        User.groups.through.objects.bulk_create(
+            User.groups.through(user_id=user.id, group_id=group.id) for user in users
+        )
+        return users
+
+    @staticmethod
+    def explain(sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}")
+            return "\n".join(f"    {' '.join(str(column) for column in row)}" for row in cursor.fetchall())
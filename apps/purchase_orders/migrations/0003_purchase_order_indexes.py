@@ -0,0 +1,37 @@
+# Generated by Django 4.2 on 2026-10-17 23:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("purchase_orders", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="purchaseorder",
+            index=models.Index(
+                fields=["vendor", "order_date"], name="po_vendor_order_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="purchaseorder",
+            index=models.Index(
+                fields=["buyer", "order_date"], name="po_buyer_order_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="purchaseorder",
+            index=models.Index(
+                fields=["vendor", "status"], name="po_vendor_status_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="purchaseorder",
+            index=models.Index(
+                fields=["status", "delivery_date"], name="po_status_delivery_date_idx"
+            ),
+        ),
+    ]
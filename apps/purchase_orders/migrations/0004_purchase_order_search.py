@@ -0,0 +1,140 @@
+# Generated by Django 4.2 on 2026-10-17 23:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+FTS_TRIGGERS = (
+    """
+    CREATE TRIGGER purchase_order_search_ai AFTER INSERT ON purchase_order_search BEGIN
+        INSERT INTO purchase_order_search_fts(rowid, document) VALUES (new.id, new.document);
+    END
+    """,
+    """
+    CREATE TRIGGER purchase_order_search_ad AFTER DELETE ON purchase_order_search BEGIN
+        INSERT INTO purchase_order_search_fts(purchase_order_search_fts, rowid, document)
+        VALUES ('delete', old.id, old.document);
+    END
+    """,
+    """
+    CREATE TRIGGER purchase_order_search_au AFTER UPDATE ON purchase_order_search BEGIN
+        INSERT INTO purchase_order_search_fts(purchase_order_search_fts, rowid, document)
+        VALUES ('delete', old.id, old.document);
+        INSERT INTO purchase_order_search_fts(rowid, document) VALUES (new.id, new.document);
+    END
+    """,
+)
+
+
+def search_index():
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+
+    return GinIndex(SearchVector("document", config="simple"), name="po_search_document_idx")
+
+
+def create_search_index(apps, schema_editor):
+    model = apps.get_model("purchase_orders", "PurchaseOrderSearchDocument")
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE purchase_order_search_fts USING fts5("
+            "document, content='purchase_order_search', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2')"
+        )
+        for trigger in FTS_TRIGGERS:
+            schema_editor.execute(trigger)
+    elif schema_editor.connection.vendor == "postgresql":
+        schema_editor.add_index(model, search_index())
+
+
+def drop_search_index(apps, schema_editor):
+    model = apps.get_model("purchase_orders", "PurchaseOrderSearchDocument")
+    if schema_editor.connection.vendor == "sqlite":
+        for name in ("ai", "ad", "au"):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS purchase_order_search_{name}")
+        schema_editor.execute("DROP TABLE IF EXISTS purchase_order_search_fts")
+    elif schema_editor.connection.vendor == "postgresql":
+        schema_editor.remove_index(model, search_index())
+
+
+def build_search_documents(apps, schema_editor):
+    PurchaseOrder = apps.get_model("purchase_orders", "PurchaseOrder")
+    PurchaseOrderSearchDocument = apps.get_model("purchase_orders", "PurchaseOrderSearchDocument")
+    words = {
+        po_id: [po_number, business_name, vendor_code]
+        for po_id, po_number, business_name, vendor_code in PurchaseOrder.objects.values_list(
+            "id", "po_number", "vendor__business_name", "vendor__vendor_code"
+        ).iterator()
+    }
+    for po_id, name in PurchaseOrder.items.through.objects.values_list(
+        "purchaseorder_id", "item__name"
+    ).iterator():
+        words[po_id].append(name)
+    PurchaseOrderSearchDocument.objects.bulk_create(
+        (
+            PurchaseOrderSearchDocument(
+                purchase_order_id=po_id, document=" ".join(word for word in values if word)
+            )
+            for po_id, values in words.items()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("purchase_orders", "0003_purchase_order_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PurchaseOrderSearchDocument",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("document", models.TextField(default="")),
+                (
+                    "purchase_order",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="search_document",
+                        to="purchase_orders.purchaseorder",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "purchase_order_search",
+            },
+        ),
+        migrations.CreateModel(
+            name="PurchaseOrderSearchIndex",
+            fields=[
+                (
+                    "search_document",
+                    models.OneToOneField(
+                        db_column="rowid",
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        primary_key=True,
+                        related_name="index",
+                        serialize=False,
+                        to="purchase_orders.purchaseordersearchdocument",
+                    ),
+                ),
+                ("document", models.TextField()),
+                ("rank", models.FloatField()),
+            ],
+            options={
+                "db_table": "purchase_order_search_fts",
+                "managed": False,
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(build_search_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-18 00:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("purchase_orders", "0004_purchase_order_search"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="purchaseorder",
+            name="version",
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
@@ -1,4 +1,7 @@
-from django.db import models
+from django.db import DatabaseError, models, transaction
+from django.db.models import F
+from django.utils import timezone
+from apps.users.metrics import CONTRIBUTION_FIELDS
 from apps.utils.abstract_user import BuyerAbstract, VendorAbstract
 from apps.utils.abstracts import AbstractUUID
 from apps.utils.constant import DATETIME_FORMAT
@@ -16,6 +19,56 @@ class Item(AbstractUUID):
          validators=[MinValueValidator(0.0), DecimalValidator(max_digits=16, decimal_places=1)]
         )
 
+    @classmethod
+    def get_or_create_many(cls, keys):
+        """
+        Returns the items of the (name, quantity) pairs keyed by pair, fetching
+        the existing ones with one query and inserting the rest with another.
+        """
+        keys = set(keys)
+        items = {}
+        for item in cls.objects.filter(name__in={name for name, _ in keys}).order_by("pk"):
+            if (item.name, item.quantity) in keys:
+                items.setdefault((item.name, item.quantity), item)
+        missing = [cls(name=name, quantity=quantity) for name, quantity in keys if (name, quantity) not in items]
+        for item in cls.objects.bulk_create(missing):
+            items[(item.name, item.quantity)] = item
+        return items
+
+
+class VersionConflict(DatabaseError):
+    """The purchase order was changed since the version being saved was read"""
+
+
+class PurchaseOrderQuerySet(models.QuerySet):
+    def with_serializer_relations(self, serializer):
+        """
+        Fetches the relations `serializer` renders, joining single relations
+        and prefetching the rest, in a fixed number of queries.
+        """
+        select_related, prefetch_related = serializer.related_lookups()
+        queryset = self.prefetch_related(*prefetch_related)
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        return queryset
+
+    def transition(self, status):
+        """
+        Moves the purchase orders of the queryset that may reach `status` to
+        it with one UPDATE, locking them first. Returns the id and previous
+        metric columns of each purchase order moved.
+        """
+        moved = self.model.objects.filter(
+            pk__in=self.values("pk"), status__in=POStatusEnum.transition_origins(status)
+        )
+        with transaction.atomic():
+            previous = list(moved.select_for_update().values("id", *CONTRIBUTION_FIELDS))
+            self.model.objects.filter(
+                pk__in=[row["id"] for row in previous], status__in=POStatusEnum.transition_origins(status)
+            ).update(status=status, updated_at=timezone.now(), version=F("version") + 1)
+        return previous
+
+
 class PurchaseOrder(VendorAbstract, AbstractUUID):
     """Purchase Order"""
     # vendor = models.ForeignKey(
@@ -48,10 +101,92 @@ class PurchaseOrder(VendorAbstract, AbstractUUID):
     issue_date = models.DateTimeField(null=True, blank=True) 
     acknowledgment_date = models.DateTimeField(blank=True, null=True, editable=False) 
     updated_at = models.DateTimeField(auto_now=True, editable=False)
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    objects = PurchaseOrderQuerySet.as_manager()
  
 
     class Meta:
         ordering = ("-order_date",)
         db_table = "purchase_order"
         verbose_name = "Purchase order"
-        verbose_name_plural = "Purchase orders"
\ No newline at end of file
+        verbose_name_plural = "Purchase orders"
+        indexes = [
+            models.Index(fields=["vendor", "order_date"], name="po_vendor_order_date_idx"),
+            models.Index(fields=["buyer", "order_date"], name="po_buyer_order_date_idx"),
+            models.Index(fields=["vendor", "status"], name="po_vendor_status_idx"),
+            models.Index(fields=["status", "delivery_date"], name="po_status_delivery_date_idx"),
+        ]
+
+    def claim_version(self):
+        """
+        Moves the row to the next version while it is still at the one the
+        instance was read at, raising VersionConflict otherwise. Call it in
+        the transaction saving the change, the row stays locked until then.
+        """
+        claimed = PurchaseOrder.objects.filter(pk=self.pk, version=self.version).update(
+            version=F("version") + 1
+        )
+        if claimed != 1:
+            raise VersionConflict(f"Purchase order {self.po_number} was changed by someone else, reload it and retry")
+        self.version += 1
+
+
+class PurchaseOrderSearchDocument(models.Model):
+    """Text a purchase order is found by, kept in the full-text search index"""
+    purchase_order = models.OneToOneField(
+        PurchaseOrder, on_delete=models.CASCADE, related_name="search_document"
+    )
+    document = models.TextField(default="")
+
+    class Meta:
+        db_table = "purchase_order_search"
+
+    @classmethod
+    def refresh(cls, purchase_order_ids, batch_size=500):
+        """
+        Rebuilds the documents of the purchase orders from their po number,
+        vendor name and code and item names.
+        """
+        purchase_order_ids = list(purchase_order_ids)
+        for start in range(0, len(purchase_order_ids), batch_size):
+            batch = purchase_order_ids[start:start + batch_size]
+            words = {
+                po_id: [po_number, business_name, vendor_code]
+                for po_id, po_number, business_name, vendor_code in PurchaseOrder.objects.filter(
+                    id__in=batch
+                ).values_list("id", "po_number", "vendor__business_name", "vendor__vendor_code")
+            }
+            for po_id, name in PurchaseOrder.items.through.objects.filter(
+                purchaseorder_id__in=words
+            ).values_list("purchaseorder_id", "item__name"):
+                words[po_id].append(name)
+            cls.objects.bulk_create(
+                [
+                    cls(purchase_order_id=po_id, document=" ".join(word for word in values if word))
+                    for po_id, values in words.items()
+                ],
+                update_conflicts=True,
+                unique_fields=["purchase_order"],
+                update_fields=["document"],
+            )
+
+
+class PurchaseOrderSearchIndex(models.Model):
+    """
+    The SQLite FTS5 table indexing the search documents, whose rowid is the
+    document id. PostgreSQL indexes the documents with a GIN index instead.
+    """
+    search_document = models.OneToOneField(
+        PurchaseOrderSearchDocument,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column="rowid",
+        related_name="index",
+    )
+    document = models.TextField()
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = "purchase_order_search_fts"
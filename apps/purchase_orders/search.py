@@ -0,0 +1,59 @@
+import re
+
+from django.db import connection
+from django.db.models import F, Lookup
+
+from .models import PurchaseOrderSearchIndex
+
+SEARCH_CONFIG = "simple"
+
+
+class Match(Lookup):
+    lookup_name = "match"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", lhs_params + rhs_params
+
+
+PurchaseOrderSearchIndex._meta.get_field("document").register_lookup(Match)
+
+
+def search_terms(value):
+    return re.findall(r"\w+", value or "")
+
+
+def search_purchase_orders(queryset, value, ranked=True):
+    """
+    Purchase orders whose search document has words starting with every term
+    of `value` through the full-text index, best matches first when `ranked`.
+    """
+    terms = search_terms(value)
+    if not terms:
+        return queryset
+    ordering = list(queryset.query.order_by)
+
+    if connection.vendor == "sqlite":
+        match = " ".join(f'"{term}"*' for term in terms)
+        queryset = queryset.filter(search_document__index__document__match=match)
+        if not ranked:
+            return queryset
+        # bm25 ranks better matches lower
+        return queryset.order_by(F("search_document__index__rank").asc(), *ordering)
+
+    if connection.vendor == "postgresql":
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+        vector = SearchVector("search_document__document", config=SEARCH_CONFIG)
+        query = SearchQuery(
+            " & ".join(f"{term}:*" for term in terms), search_type="raw", config=SEARCH_CONFIG
+        )
+        queryset = queryset.annotate(search_vector=vector).filter(search_vector=query)
+        if not ranked:
+            return queryset
+        return queryset.annotate(search_rank=SearchRank(vector, query)).order_by("-search_rank", *ordering)
+
+    for term in terms:
+        queryset = queryset.filter(search_document__document__icontains=term)
+    return queryset
@@ -1,22 +1,29 @@
-from datetime import datetime
 import logging
+import uuid
 
 from django.apps import apps
 from django.conf import settings
+from django.db import transaction
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from rest_framework import serializers
 
 from apps.users.models import VendorProfile
 from apps.users.serializer import UserSerializer, VendorSerializer
+from apps.users.signals import purchase_orders_bulk_created, purchase_orders_transitioned
 from .models import Item, PurchaseOrder
 from apps.utils.constant import DATETIME_FORMAT
 from apps.utils.enums import POStatusEnum
+from apps.utils.fieldsets import ExpandableFieldsMixin
 
 
 logger = logging.getLogger("purchase_order")
 
+BULK_CREATE_MAX_ROWS = 1000
+BULK_TRANSITION_MAX_IDS = 1000
 
-class ItemSerializer(serializers.Serializer):
+
+class ItemSerializer(ExpandableFieldsMixin, serializers.Serializer):
     """Purchase order item serializer"""
     name = serializers.CharField(max_length=255)
     quantity = serializers.IntegerField(default=1, min_value=1)
@@ -25,9 +32,7 @@ class ItemSerializer(serializers.Serializer):
         pass
    
 
-class PurchaseOrderSerializer(serializers.ModelSerializer):
-    vendor = VendorSerializer(read_only=True)
-    user = UserSerializer(read_only=True)
+class PurchaseOrderSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
     order_date = serializers.DateTimeField(
         format=DATETIME_FORMAT, read_only=True
     )
@@ -40,8 +45,13 @@ class PurchaseOrderSerializer(serializers.ModelSerializer):
     issue_date = serializers.DateTimeField(
         format=DATETIME_FORMAT, read_only=True
     )
-    items = ItemSerializer(many=True, read_only=True)
     quantity = serializers.IntegerField(default=1)
+    expandable_fields = {
+        "vendor": (VendorSerializer, {}),
+        "items": (ItemSerializer, {"many": True}),
+        "buyer": (UserSerializer, {}),
+    }
+    default_expand = ("vendor", "items")
 
     class Meta:
         model = PurchaseOrder
@@ -57,42 +67,73 @@ class PurchaseOrderFormSerializer(serializers.Serializer):
     items = ItemSerializer(many=True, required=False)
     status = serializers.ChoiceField(choices=POStatusEnum.choices(), default=POStatusEnum.PENDING)
 
+    @transaction.atomic
     def create(self, validated_data):
         items = validated_data.pop('items', [])
        
         instance = PurchaseOrder.objects.create(**validated_data)
-        item_instances = []
         if len(items) > 0:
-            instance
-            for item in items:
-                obj, _ = Item.objects.get_or_create(**item)
-                item_instances.append(obj)
-            instance.items.set(item_instances)
-        instance.save()
+            self.set_items(instance, items)
         return instance
 
+    @transaction.atomic
     def update(self, instance, validated_data):
+        """
+        Writes only the columns whose value changes, over the version of the
+        purchase order the instance was read at.
+        """
         items = validated_data.pop("items", None)
 
+        update_fields = ["updated_at"]
         for key, value in validated_data.items():
-            setattr(instance, key, value)
+            field = instance._meta.get_field(key)
+            current = getattr(instance, field.attname)
+            if current != (value.pk if field.is_relation and value is not None else value):
+                setattr(instance, key, value)
+                update_fields.append(key)
 
+        instance.claim_version()
         if items is not None:
-            instance.items.clear()
-            for item in items:
-                po, _ = Item.objects.get_or_create(**item)
-                instance.items.add(po)
-        instance.save()
+            self.set_items(instance, items)
+        instance.save(update_fields=update_fields)
         return instance
 
+    @staticmethod
+    def set_items(instance, items):
+        """
+        Links the purchase order to exactly `items`, resolving them in two
+        queries and only inserting and deleting the links that changed.
+        """
+        resolved = Item.get_or_create_many((item["name"], item["quantity"]) for item in items)
+        instance.items.set(resolved.values())
+
     def validate(self, attrs):
-        
+        if self.instance is not None and settings.PO_ENFORCE_STATUS_TRANSITIONS:
+            # an update keeps the status unless asked to move it, along POStatusEnum.transitions
+            if "status" not in self.initial_data:
+                attrs.pop("status", None)
+            target = attrs.get("status", self.instance.status)
+            if target != self.instance.status and self.instance.status not in POStatusEnum.transition_origins(target):
+                raise serializers.ValidationError(
+                    f"A {self.instance.status} purchase order cannot be moved to {target}"
+                )
+
         if attrs.get("vendor_id"):
             vendor_id = attrs.pop("vendor_id")
-            vendor = get_object_or_404(VendorProfile, pk=vendor_id)
+            # bulk validation looks the vendors of all rows up at once
+            vendors = self.context.get("vendors")
+            if vendors is None:
+                vendor = get_object_or_404(VendorProfile, pk=vendor_id)
+            else:
+                try:
+                    vendor = vendors.get(str(uuid.UUID(vendor_id)))
+                except ValueError:
+                    vendor = None
+                if vendor is None:
+                    raise serializers.ValidationError("Vendor does not exist")
             attrs.update(
                 {
-                    "issue_date": datetime.now(),
+                    "issue_date": timezone.now(),
                     "vendor": vendor
                 }
             )
@@ -118,6 +159,74 @@ class PurchaseOrderFormSerializer(serializers.Serializer):
         return value
 
 
+class PurchaseOrderBulkFormSerializer(serializers.Serializer):
+    """
+    Validates purchase orders row by row, collecting the errors of each, and
+    creates the valid ones together in a fixed number of queries.
+    """
+    purchase_orders = serializers.ListField(
+        child=serializers.DictField(), allow_empty=False, max_length=BULK_CREATE_MAX_ROWS
+    )
+
+    def validate(self, attrs):
+        rows = attrs["purchase_orders"]
+        vendor_ids = set()
+        for row in rows:
+            try:
+                vendor_ids.add(str(uuid.UUID(str(row.get("vendor_id")))))
+            except ValueError:
+                pass
+        vendors = {str(vendor.pk): vendor for vendor in VendorProfile.objects.filter(pk__in=vendor_ids)}
+
+        valid, errors = [], []
+        for index, row in enumerate(rows):
+            serializer = PurchaseOrderFormSerializer(data=row, context={"vendors": vendors})
+            if not serializer.is_valid():
+                errors.append({"index": index, "errors": serializer.errors})
+            elif not serializer.validated_data.get("delivery_date"):
+                errors.append({"index": index, "errors": {"delivery_date": ["This field is required."]}})
+            else:
+                valid.append(serializer.validated_data)
+        return {"purchase_orders": valid, "errors": errors}
+
+    def create(self, validated_data):
+        rows = validated_data["purchase_orders"]
+        po_numbers = validated_data["po_numbers"]
+        buyer = validated_data.get("buyer")
+
+        items = Item.get_or_create_many((item["name"], item["quantity"]) for row in rows for item in row.get("items", []))
+
+        purchase_orders = PurchaseOrder.objects.bulk_create(
+            PurchaseOrder(po_number=po_number, buyer=buyer, **{k: v for k, v in row.items() if k != "items"})
+            for po_number, row in zip(po_numbers, rows)
+        )
+        PurchaseOrder.items.through.objects.bulk_create(
+            PurchaseOrder.items.through(purchaseorder_id=instance.pk, item_id=item_id)
+            for instance, row in zip(purchase_orders, rows)
+            for item_id in {items[(item["name"], item["quantity"])].pk for item in row.get("items", [])}
+        )
+        purchase_orders_bulk_created(purchase_orders)
+        return purchase_orders
+
+
+class PurchaseOrderTransitionSerializer(serializers.Serializer):
+    """
+    Moves the listed purchase orders allowed to reach `status` to it with a
+    single UPDATE, updating vendor metrics once per vendor.
+    """
+    ids = serializers.ListField(
+        child=serializers.UUIDField(), allow_empty=False, max_length=BULK_TRANSITION_MAX_IDS
+    )
+    status = serializers.ChoiceField(choices=POStatusEnum.choices())
+
+    @transaction.atomic
+    def create(self, validated_data):
+        target = validated_data["status"]
+        previous = validated_data["queryset"].filter(id__in=validated_data["ids"]).transition(target)
+        purchase_orders_transitioned(previous, target)
+        return [row["id"] for row in previous]
+
+
 class PurchaseOrderAcknowledgementSerializer(serializers.Serializer):
     acknowledgment_date = serializers.DateTimeField(
         format=DATETIME_FORMAT, required=True
@@ -1,6 +1,8 @@
 import logging
 
+from django.db import transaction
 from django.db.models import Q
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 # Create your views here.
@@ -11,48 +13,61 @@ from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
-from apps.users.models import VendorProfile
 from apps.utils.enums import POStatusEnum
 
-from .models import PurchaseOrder
-from .serializer import PurchaseOrderAcknowledgementSerializer, PurchaseOrderSerializer, PurchaseOrderFormSerializer
+from .filters import PurchaseOrderFilter, PurchaseOrderSearchFilter
+from .models import PurchaseOrder, VersionConflict
+from .serializer import (
+    PurchaseOrderAcknowledgementSerializer,
+    PurchaseOrderBulkFormSerializer,
+    PurchaseOrderFormSerializer,
+    PurchaseOrderSerializer,
+    PurchaseOrderTransitionSerializer,
+)
+from apps.utils.authentication import get_principal
+from apps.utils.counting import count_queryset
+from apps.utils.conditional import (
+    conditional_validators,
+    not_modified_response,
+    precondition_failed,
+    resource_validators,
+    set_validators,
+)
+from apps.utils.identifiers import save_with_identifier
 from apps.utils.base import BaseViewSet
 from apps.utils.permissions import vendor_access_only
 
 
 logger = logging.getLogger("purchase_order")
 
+# columns whose changes show in a purchase order's representation
+REPRESENTATION_FIELDS = ("updated_at", "vendor__updated_at", "vendor__user__updated_at")
+# state a single purchase order's validators follow, its version moving on every write
+RESOURCE_FIELDS = ("version", *REPRESENTATION_FIELDS)
+
  
 class PurchaseOrderViewSet(BaseViewSet):
     serializer_class = PurchaseOrderSerializer
     queryset = PurchaseOrder.objects.all()
     serializer_form_class = PurchaseOrderFormSerializer
-    filter_fields = [
-        "vendor__id",
-        "buyer__id",
-        "po_number",
-        "order_date",
-        "quality_rating",
-        "delivery_date",
-        "acknowledgment_date",
-    ]
-    search_fields = [
-        "vendor__id",
-        "buyer__id",
-        "po_number",
-        "order_date",
-        "quality_rating",
-        "delivery_date",
-        "acknowledgment_date",
-    ]
+    filterset_class = PurchaseOrderFilter
+    search_backends = PurchaseOrderSearchFilter()
 
     def get_queryset(self):
-        self.queryset = self.order_date_filtering(
-            self.request.GET.get("order_date_from"), self.request.GET.get("order_date_to"), self.queryset
-        )
-        if VendorProfile.objects.filter(user__id=self.request.user.id).exists():
-            return self.queryset.filter(vendor=self.get_vendor(self.request)).distinct().order_by("-order_date")
-        return self.queryset.filter(Q(vendor=self.get_vendor(self.request)) | Q(buyer=self.request.user)).distinct().order_by("-order_date")
+        vendor = self.get_vendor(self.request)
+        if get_principal(self.request).vendor is not None:
+            return self.queryset.filter(vendor=vendor).distinct().order_by("-order_date")
+        return self.queryset.filter(Q(vendor=vendor) | Q(buyer=self.request.user)).distinct().order_by("-order_date")
+
+    def get_write_queryset(self):
+        """
+        Purchase orders the caller may change: a vendor's own orders, or the
+        orders a buyer placed. Unlike get_queryset it ignores ?vendor_id=.
+        """
+        principal = get_principal(self.request)
+        if principal.vendor is not None:
+            return self.queryset.filter(vendor=principal.vendor)
+        return self.queryset.filter(buyer=self.request.user)
 
     def get_object(self):
         return get_object_or_404(PurchaseOrder, id=self.kwargs.get("pk"))
@@ -84,63 +99,140 @@ class PurchaseOrderViewSet(BaseViewSet):
             openapi.Parameter(
                 "quality_rating",
                 openapi.IN_QUERY,
-                type=openapi.TYPE_INTEGER,
+                type=openapi.TYPE_NUMBER,
                 required=False,
                 description="Quality Rating",
-            ), 
-             openapi.Parameter(
-                "order_date",
+            ),
+            openapi.Parameter(
+                "quality_rating__gte",
+                openapi.IN_QUERY,
+                type=openapi.TYPE_NUMBER,
+                required=False,
+                description="Minimum Quality Rating",
+            ),
+            openapi.Parameter(
+                "quality_rating__lte",
+                openapi.IN_QUERY,
+                type=openapi.TYPE_NUMBER,
+                required=False,
+                description="Maximum Quality Rating",
+            ),
+            openapi.Parameter(
+                "status",
                 openapi.IN_QUERY,
                 type=openapi.TYPE_STRING,
                 required=False,
-                description="Order Date",
+                description="Purchase Order Status",
+            ),
+            openapi.Parameter(
+                "status__in",
+                openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                required=False,
+                description="Comma separated Purchase Order Statuses",
+            ),
+            openapi.Parameter(
+                "order_date_from",
+                openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                required=False,
+                description="Purchase Order Order Date From, ISO 8601 date or datetime",
+            ),
+            openapi.Parameter(
+                "order_date_to",
+                openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                required=False,
+                description="Purchase Order Order Date To, ISO 8601 date or datetime",
             ),
             openapi.Parameter(
                 "delivery_date_from",
                 openapi.IN_QUERY,
                 type=openapi.TYPE_STRING,
                 required=False,
-                description="Purchase Order Delivery Date From",
+                description="Purchase Order Delivery Date From, ISO 8601 date or datetime",
             ),
             openapi.Parameter(
                 "delivery_date_to",
                 openapi.IN_QUERY,
                 type=openapi.TYPE_STRING,
                 required=False,
-                description="Purchase Order Delivery Date To",
-
+                description="Purchase Order Delivery Date To, ISO 8601 date or datetime",
             ),
             openapi.Parameter(
                 "acknowledgment_date_from",
                 openapi.IN_QUERY,
                 type=openapi.TYPE_STRING,
                 required=False,
-                description="Purchase Order Acknowledgment Date From",
+                description="Purchase Order Acknowledgment Date From, ISO 8601 date or datetime",
             ),
             openapi.Parameter(
                 "acknowledgment_date_to",
                 openapi.IN_QUERY,
                 type=openapi.TYPE_STRING,
                 required=False,
-                description="Purchase Order Acknowledgment Date To",
-
-            )
+                description="Purchase Order Acknowledgment Date To, ISO 8601 date or datetime",
+            ),
+            openapi.Parameter(
+                "ordering",
+                openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                required=False,
+                description="One of order_date, delivery_date, acknowledgment_date, quality_rating or po_number, prefixed with - for descending",
+            ),
+            openapi.Parameter(
+                "search",
+                openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                required=False,
+                description="Words the PO number, item names or vendor name or code start with, best matches first",
+            ),
+            openapi.Parameter(
+                "fields",
+                openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                required=False,
+                description="Comma separated fields to return, nested ones dotted as in vendor.business_name",
+            ),
+            openapi.Parameter(
+                "expand",
+                openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                required=False,
+                description="Comma separated relations to nest out of vendor, vendor.user, items and buyer, the others being ids. Defaults to vendor, vendor.user and items",
+            ),
         ],
     )
     def list(self, request, *args, **kwargs):
         context = {"status": status.HTTP_200_OK}
+        validators = None
         try:
             logger.info(f"Fetching all purchase order for user_id")
+            queryset = self.get_list(
+                self.get_queryset().with_serializer_relations(self.serializer_class(context={"request": request}))
+            )
+            count = None
+            # cursor pages and streams skip counting, so they go without validators
+            if self.paginator_class.counts_total(request):
+                count = count_queryset(queryset, request=request, view=self)
+                validators = conditional_validators(request, queryset, REPRESENTATION_FIELDS, count=count)
+                not_modified = not_modified_response(request, validators)
+                if not_modified is not None:
+                    return not_modified
             paginate = self.get_paginated_data(
-                queryset=self.get_list(self.get_queryset()), serializer_class=self.serializer_class
+                queryset=queryset,
+                serializer_class=self.serializer_class,
+                count=count,
             )
+            if isinstance(paginate, StreamingHttpResponse):
+                return paginate
             context.update({"status": status.HTTP_200_OK, "data": paginate})
         except Exception as ex:
             logger.error(
                 f"Error fetching all purchase order for user_id {request.user.id} due to {str(ex)}"
             )
             context.update({"status": status.HTTP_400_BAD_REQUEST, "message": str(ex)})
-        return Response(context, status=context["status"])
+        return set_validators(Response(context, status=context["status"]), validators)
 
     @swagger_auto_schema(
         operation_description="Retrieve purchase order details",
@@ -148,11 +240,17 @@ class PurchaseOrderViewSet(BaseViewSet):
     )
     def retrieve(self, requests, *args, **kwargs):
         context = {"status": status.HTTP_200_OK}
+        validators = None
         try:
+            pk = self.kwargs.get("pk")
+            validators = resource_validators(pk, PurchaseOrder.objects.filter(id=pk), RESOURCE_FIELDS)
+            not_modified = not_modified_response(requests, validators)
+            if not_modified is not None:
+                return not_modified
             context.update({"data": self.serializer_class(self.get_object()).data})
         except Exception as ex:
             context.update({"status": status.HTTP_400_BAD_REQUEST, "message": str(ex)})
-        return Response(context, status=context["status"])
+        return set_validators(Response(context, status=context["status"]), validators)
 
     @swagger_auto_schema(
         operation_description="Delete purchase order",
@@ -182,12 +280,13 @@ class PurchaseOrderViewSet(BaseViewSet):
             serializer = self.serializer_form_class(data=data)
 
             if serializer.is_valid():
-                serializer.validated_data.update(
-                    po_number=self.unique_number_generator(PurchaseOrder, "po_number", 12),
-                    buyer=request.user,
-                    )
-                instance = serializer.create(serializer.validated_data)
-               
+                instance = save_with_identifier(
+                    lambda po_number: serializer.create(
+                        {**serializer.validated_data, "po_number": po_number, "buyer": request.user}
+                    ),
+                    lambda: self.unique_number_generator(PurchaseOrder, "po_number", 12),
+                )
+
                 context.update({"data": self.serializer_class(instance).data})
             else:
                 context.update(
@@ -200,6 +299,83 @@ class PurchaseOrderViewSet(BaseViewSet):
             context.update({"status": status.HTTP_400_BAD_REQUEST, "message": str(ex)})
         return Response(context, status=context["status"])
 
+    @swagger_auto_schema(
+        operation_summary="Create purchase orders in bulk", request_body=PurchaseOrderBulkFormSerializer
+    )
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk_create(self, request, *args, **kwargs):
+        """
+        Creates the valid purchase orders of a list together and reports the
+        errors of the others by their index in the list.
+        """
+        context = {"status": status.HTTP_201_CREATED}
+        try:
+            data = request.data if not isinstance(request.data, list) else {"purchase_orders": request.data}
+            serializer = PurchaseOrderBulkFormSerializer(data=data)
+
+            if serializer.is_valid():
+                rows = serializer.validated_data["purchase_orders"]
+                errors = [
+                    {"index": error["index"], "errors": self.error_message_formatter(error["errors"])}
+                    for error in serializer.validated_data["errors"]
+                ]
+                instances = save_with_identifier(
+                    lambda po_numbers: serializer.create(
+                        {**serializer.validated_data, "po_numbers": po_numbers, "buyer": request.user}
+                    ),
+                    lambda: self.unique_numbers_generator(PurchaseOrder, "po_number", len(rows), 12),
+                )
+                output = self.serializer_class(context={"request": request})
+                queryset = PurchaseOrder.objects.filter(
+                    id__in=[instance.pk for instance in instances]
+                ).with_serializer_relations(output)
+                context.update(
+                    {
+                        "status": status.HTTP_201_CREATED if rows else status.HTTP_400_BAD_REQUEST,
+                        "data": self.serializer_class(queryset, many=True, context={"request": request}).data,
+                        "errors": errors,
+                    }
+                )
+            else:
+                context.update(
+                    {
+                        "errors": self.error_message_formatter(serializer.errors),
+                        "status": status.HTTP_400_BAD_REQUEST,
+                    }
+                )
+        except Exception as ex:
+            context.update({"status": status.HTTP_400_BAD_REQUEST, "message": str(ex)})
+        return Response(context, status=context["status"])
+
+    @swagger_auto_schema(
+        operation_summary="Move purchase orders to a status", request_body=PurchaseOrderTransitionSerializer
+    )
+    @action(detail=False, methods=["post"], url_path="transition")
+    def transition(self, request, *args, **kwargs):
+        """
+        Moves the listed purchase orders to a status in one update, skipping
+        those that cannot move to it from their current status.
+        """
+        context = {"status": status.HTTP_200_OK}
+        try:
+            serializer = PurchaseOrderTransitionSerializer(data=request.data)
+
+            if serializer.is_valid():
+                updated = serializer.create({**serializer.validated_data, "queryset": self.get_write_queryset()})
+                moved = set(updated)
+                skipped = [pk for pk in dict.fromkeys(serializer.validated_data["ids"]) if pk not in moved]
+                context.update({"data": {"updated": updated, "skipped": skipped}})
+            else:
+                context.update(
+                    {
+                        "errors": self.error_message_formatter(serializer.errors),
+                        "status": status.HTTP_400_BAD_REQUEST,
+                    }
+                )
+        except Exception as ex:
+            context.update({"status": status.HTTP_400_BAD_REQUEST, "message": str(ex)})
+        return Response(context, status=context["status"])
+
     @swagger_auto_schema(
         operation_summary="Update purchase order", request_body=PurchaseOrderFormSerializer
     )
@@ -209,19 +385,25 @@ class PurchaseOrderViewSet(BaseViewSet):
         """
         
         context = {"status": status.HTTP_200_OK}
+        validators = None
         try:
             data = self.get_data(request)
             instance = self.get_object()
           
             self.user_obj_permission(request, instance)
-            
+            # read after the instance, the save then catches any change made in between
+            current = PurchaseOrder.objects.filter(id=instance.pk)
+            if precondition_failed(request, resource_validators(instance.pk, current, RESOURCE_FIELDS)):
+                raise VersionConflict(f"Purchase order {instance.po_number} has changed, reload it and retry")
+
             serializer = self.serializer_form_class(data=data, instance=instance)
 
             if serializer.is_valid():
-                _ = serializer.update(instance, serializer.validated_data)
+                instance = serializer.update(instance, serializer.validated_data)
+                validators = resource_validators(instance.pk, current, RESOURCE_FIELDS)
                 context.update(
                     {
-                        "data": self.serializer_class(self.get_object()).data,
+                        "data": self.serializer_class(instance).data,
                         "status": status.HTTP_200_OK,
                     }
                 )
@@ -232,9 +414,11 @@ class PurchaseOrderViewSet(BaseViewSet):
                         "status": status.HTTP_400_BAD_REQUEST,
                     }
                 )
+        except VersionConflict as ex:
+            context.update({"status": status.HTTP_412_PRECONDITION_FAILED, "message": str(ex)})
         except Exception as ex:
             context.update({"status": status.HTTP_400_BAD_REQUEST, "message": str(ex)})
-        return Response(context, status=context["status"])
+        return set_validators(Response(context, status=context["status"]), validators)
 
     @swagger_auto_schema(
             operation_summary="The endpoint handles purchase order acknowledgement by vendor",
@@ -260,12 +444,14 @@ class PurchaseOrderViewSet(BaseViewSet):
 
             if instance.status == POStatusEnum.COMPLETED:
                 
-                instance.acknowledgment_date = timezone.now()
-                instance.save()
+                with transaction.atomic():
+                    instance.claim_version()
+                    instance.acknowledgment_date = timezone.now()
+                    instance.save(update_fields=["acknowledgment_date", "updated_at"])
                 
                 context.update(
                         {
-                            "data": self.serializer_class(self.get_object()).data,
+                            "data": self.serializer_class(instance).data,
                             "status": status.HTTP_200_OK,
                         }
                     )
@@ -276,6 +462,8 @@ class PurchaseOrderViewSet(BaseViewSet):
                         "status": status.HTTP_400_BAD_REQUEST,
                     }
                 )
+        except VersionConflict as ex:
+            context.update({"status": status.HTTP_409_CONFLICT, "message": str(ex)})
         except Exception as ex:
             context.update({"status": status.HTTP_400_BAD_REQUEST, "message": str(ex)})
         return Response(context, status=context["status"])
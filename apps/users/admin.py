@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import BuyerSettings, User, VendorProfile, VendorHistoricalPerformance
+from .models import BuyerSettings, IdentifierSequence, User, VendorProfile, VendorHistoricalPerformance, VendorMetricAccumulator, VendorMetricCheckpoint, VendorMetricsQueue, VendorPerformanceRollup
 
 
 class UserAdmin(admin.ModelAdmin):
@@ -52,8 +52,48 @@ class VendorHistoricalPerformanceAdmin(admin.ModelAdmin):
         "average_response_time",
         "fulfillment_rate",
         )
-    
+
+
+class VendorMetricAccumulatorAdmin(admin.ModelAdmin):
+    search_fields = ("vendor__id", "vendor__business_name", "vendor__vendor_code")
+    list_display = (
+        "vendor",
+        "total_po_count",
+        "completed_count",
+        "on_time_count",
+        "quality_rating_sum",
+        "response_time_sum",
+        "response_count",
+        "updated_at",
+        )
+
+
+class VendorMetricCheckpointAdmin(admin.ModelAdmin):
+    search_fields = ("vendor__id", "vendor__business_name")
+    list_display = ("vendor", "date", "total_po_count", "completed_count")
+
+
+class VendorMetricsQueueAdmin(admin.ModelAdmin):
+    search_fields = ("vendor__id", "vendor__business_name")
+    list_display = ("vendor", "dirty_since")
+
+
+class VendorPerformanceRollupAdmin(admin.ModelAdmin):
+    search_fields = ("vendor__id", "vendor__business_name")
+    list_display = ("vendor", "resolution", "bucket", "sample_count")
+    list_filter = ("resolution",)
+
+
+class IdentifierSequenceAdmin(admin.ModelAdmin):
+    search_fields = ("name",)
+    list_display = ("name", "next_value")
+
 admin.site.register(User, UserAdmin)
 admin.site.register(BuyerSettings, BuyerSettingsAdmin)
 admin.site.register(VendorProfile, VendorProfileAdmin)
 admin.site.register(VendorHistoricalPerformance, VendorHistoricalPerformanceAdmin)
+admin.site.register(VendorMetricAccumulator, VendorMetricAccumulatorAdmin)
+admin.site.register(VendorMetricCheckpoint, VendorMetricCheckpointAdmin)
+admin.site.register(VendorMetricsQueue, VendorMetricsQueueAdmin)
+admin.site.register(VendorPerformanceRollup, VendorPerformanceRollupAdmin)
+admin.site.register(IdentifierSequence, IdentifierSequenceAdmin)
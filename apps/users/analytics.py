@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from itertools import islice
+
+import numpy as np
+from django.apps import apps
+from django.conf import settings
+from django.utils import timezone
+
+from apps.users.metrics import ON_TIME_DELIVERY_WINDOW, TOTAL_FIELDS, empty_totals, metrics_from_totals
+from apps.utils.enums import POStatusEnum
+
+DEFAULT_CHUNK_SIZE = 100000
+
+MICROSECOND = timedelta(microseconds=1)
+
+# Purchase order columns streamed into the arrays.
+PURCHASE_ORDER_COLUMNS = (
+    "vendor_id",
+    "status",
+    "order_date",
+    "delivery_date",
+    "quality_rating",
+    "issue_date",
+    "acknowledgment_date",
+)
+
+
+def vendor_performance_metrics(vendor_ids=None, date_from=None, date_to=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Performance metrics of every vendor over the purchase orders ordered
+    between `date_from` and `date_to`, keyed by vendor id. Matches
+    VendorProfile.aggregate_performance_metrics over the same purchase orders.
+    """
+    totals = vendor_performance_totals(vendor_ids, date_from, date_to, chunk_size)
+    return {vendor_id: metrics_from_totals(vendor_totals) for vendor_id, vendor_totals in totals.items()}
+
+
+def vendor_performance_totals(vendor_ids=None, date_from=None, date_to=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Running totals of every vendor, computed with grouped array operations
+    over the purchase orders streamed `chunk_size` rows at a time. Vendors in
+    `vendor_ids` without purchase orders get empty totals.
+    """
+    PurchaseOrder = apps.get_model("purchase_orders.PurchaseOrder")
+    queryset = PurchaseOrder.objects.order_by()
+    if vendor_ids is not None:
+        queryset = queryset.filter(vendor_id__in=vendor_ids)
+    if date_from is not None:
+        queryset = queryset.filter(order_date__gte=date_from)
+    if date_to is not None:
+        queryset = queryset.filter(order_date__lte=date_to)
+    rows = queryset.values_list(*PURCHASE_ORDER_COLUMNS).iterator(chunk_size=chunk_size)
+
+    index = {}
+    columns = {field: np.zeros(0) for field in TOTAL_FIELDS}
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        for field, values in _chunk_totals(chunk, index).items():
+            columns[field] = np.pad(columns[field], (0, len(values) - len(columns[field]))) + values
+
+    totals = {vendor_id: empty_totals() for vendor_id in vendor_ids or ()}
+    for vendor_id, code in index.items():
+        totals[vendor_id] = {
+            field: int(values[code]) if field.endswith("_count") else float(values[code])
+            for field, values in columns.items()
+        }
+    return totals
+
+
+def _chunk_totals(chunk, index):
+    """
+    Per-vendor totals of a chunk of rows, indexed by the vendor codes in
+    `index`, which is extended with the vendors seen for the first time.
+    """
+    size = len(chunk)
+    vendor_ids, statuses, order_dates, delivery_dates, ratings, issue_dates, acknowledgment_dates = zip(*chunk)
+    codes = np.fromiter(
+        (index.setdefault(vendor_id, len(index)) for vendor_id in vendor_ids), dtype=np.intp, count=size
+    )
+    completed = np.fromiter((value == POStatusEnum.COMPLETED for value in statuses), dtype=bool, count=size)
+    ratings = np.fromiter((value or 0.0 for value in ratings), dtype=np.float64, count=size)
+
+    window = ON_TIME_DELIVERY_WINDOW // MICROSECOND
+    on_time = completed & (_microseconds(delivery_dates) <= _microseconds(order_dates) + window)
+
+    issue_days, acknowledgment_days = _days(issue_dates), _days(acknowledgment_dates)
+    responded = completed & (issue_days > 0) & (acknowledgment_days > 0)
+    response_days = acknowledgment_days[responded] - issue_days[responded]
+
+    vendors = len(index)
+    return {
+        "total_po_count": np.bincount(codes, minlength=vendors),
+        "completed_count": np.bincount(codes[completed], minlength=vendors),
+        "on_time_count": np.bincount(codes[on_time], minlength=vendors),
+        "quality_rating_sum": np.bincount(codes[completed], weights=ratings[completed], minlength=vendors),
+        "response_time_sum": np.bincount(codes[responded], weights=response_days, minlength=vendors),
+        "response_count": np.bincount(codes[responded], minlength=vendors),
+    }
+
+
+def _microseconds(values):
+    """
+    Microseconds since the epoch, exact where datetime64 conversion is slow.
+    """
+    epoch = datetime(1970, 1, 1, tzinfo=dt_timezone.utc if settings.USE_TZ else None)
+    return np.fromiter(((value - epoch) // MICROSECOND for value in values), dtype=np.int64, count=len(values))
+
+
+def _days(values):
+    """
+    Proleptic ordinals of the local days, 0 standing for a missing value.
+    """
+    zone = timezone.get_current_timezone() if settings.USE_TZ else None
+    return np.fromiter(
+        (value.astimezone(zone).toordinal() if value else 0 for value in values), dtype=np.int64, count=len(values)
+    )
@@ -0,0 +1,51 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+METRICS_KEY = "vendor-metrics:{}"
+METRICS_LOCK_KEY = "vendor-metrics-lock:{}"
+METRICS_LOCK_TIMEOUT = 10  # seconds
+METRICS_LOCK_POLL_INTERVAL = 0.05  # seconds
+
+
+def get_vendor_metrics(vendor):
+    """
+    Returns the vendor's performance metrics from the cache, computing them
+    on a miss. Only one caller computes a cold key, concurrent callers wait
+    for its result instead of all querying the database at once.
+    """
+    key = METRICS_KEY.format(vendor.id)
+    metrics = cache.get(key)
+    if metrics is not None:
+        return metrics
+
+    lock_key = METRICS_LOCK_KEY.format(vendor.id)
+    if cache.add(lock_key, True, timeout=METRICS_LOCK_TIMEOUT):
+        try:
+            metrics = vendor.calculate_performance_metrics
+            cache.set(key, metrics, timeout=settings.VENDOR_METRICS_CACHE_TIMEOUT)
+        finally:
+            cache.delete(lock_key)
+        return metrics
+
+    deadline = time.monotonic() + METRICS_LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(METRICS_LOCK_POLL_INTERVAL)
+        metrics = cache.get(key)
+        if metrics is not None:
+            return metrics
+        if not cache.get(lock_key):
+            break
+    return vendor.calculate_performance_metrics
+
+
+def invalidate_vendor_metrics(vendor_ids):
+    """
+    Drops the cached metrics of the vendors, again once the current
+    transaction commits so a read racing the commit cannot cache stale values.
+    """
+    keys = [METRICS_KEY.format(vendor_id) for vendor_id in vendor_ids]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,90 @@
+import os
+from multiprocessing import Pool
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from apps.users.models import VendorHistoricalPerformance, VendorProfile
+
+
+def init_worker():
+    # spawned workers start without Django, forked ones already have it set up
+    django.setup()
+
+
+def backfill_vendor(args):
+    vendor_id, batch_size = args
+    return vendor_id, VendorHistoricalPerformance.replay(vendor_id, batch_size=batch_size)
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the vendor performance history by replaying each vendor's "
+        "purchase orders, sharding vendors across a pool of worker processes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--vendors",
+            nargs="+",
+            help="Only backfill these vendor ids",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of worker processes, 1 runs in this process",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of purchase orders read and snapshots inserted per statement",
+        )
+        parser.add_argument(
+            "--progress-file",
+            default=os.path.join(settings.LOGS_DIR, "backfill_vendor_history.progress"),
+            help="File recording the vendors already backfilled",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Skip the vendors recorded in the progress file by a previous run",
+        )
+
+    def handle(self, *args, **options):
+        vendor_ids = options["vendors"]
+        if vendor_ids is None:
+            vendor_ids = VendorProfile.objects.order_by("id").values_list("id", flat=True)
+        vendor_ids = [str(vendor_id) for vendor_id in vendor_ids]
+
+        progress_file = options["progress_file"]
+        if options["resume"] and os.path.exists(progress_file):
+            with open(progress_file) as progress:
+                done = {line.strip() for line in progress}
+            vendor_ids = [vendor_id for vendor_id in vendor_ids if vendor_id not in done]
+        elif os.path.exists(progress_file):
+            os.remove(progress_file)
+
+        total = len(vendor_ids)
+        self.stdout.write(f"Backfilling the history of {total} vendor(s)")
+        tasks = [(vendor_id, options["batch_size"]) for vendor_id in vendor_ids]
+
+        with open(progress_file, "a") as progress:
+            if options["workers"] > 1:
+                # workers must open their own connections instead of sharing ours
+                connections.close_all()
+                with Pool(options["workers"], initializer=init_worker) as pool:
+                    self.report(pool.imap_unordered(backfill_vendor, tasks), total, progress)
+            else:
+                self.report(map(backfill_vendor, tasks), total, progress)
+
+        self.stdout.write(self.style.SUCCESS(f"Backfilled the history of {total} vendor(s)"))
+
+    def report(self, results, total, progress):
+        for done, (vendor_id, written) in enumerate(results, start=1):
+            progress.write(f"{vendor_id}\n")
+            progress.flush()
+            self.stdout.write(f"[{done}/{total}] vendor {vendor_id}: {written} snapshot(s)")
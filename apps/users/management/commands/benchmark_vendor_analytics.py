@@ -0,0 +1,63 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.users.analytics import DEFAULT_CHUNK_SIZE, vendor_performance_metrics
+from apps.users.models import VendorProfile
+from apps.utils.benchmark import rolled_back, seed_purchase_orders
+
+
+class Command(BaseCommand):
+    help = (
+        "Times the vectorized analytics engine against the grouped ORM query on "
+        "synthetic purchase orders, which are rolled back afterwards"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            nargs="+",
+            default=[1000000, 10000000],
+            help="Number of synthetic purchase orders of each run",
+        )
+        parser.add_argument(
+            "--vendors",
+            type=int,
+            default=1000,
+            help="Number of synthetic vendors the purchase orders are spread over",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help="Number of rows streamed into the arrays at a time",
+        )
+
+    def handle(self, *args, **options):
+        for rows in options["rows"]:
+            with rolled_back():
+                self.run(rows, options["vendors"], options["chunk_size"])
+
+    def run(self, rows, vendor_count, chunk_size):
+        self.stdout.write(f"Seeding {rows} purchase order(s) over {vendor_count} vendor(s)")
+        vendors = VendorProfile.objects.bulk_create(
+            VendorProfile(business_name=f"Benchmark vendor {number}", vendor_code=f"BENCH{number}")
+            for number in range(vendor_count)
+        )
+        vendor_ids = [vendor.id for vendor in vendors]
+        seed_purchase_orders(rows, vendor_ids)
+
+        started = time.perf_counter()
+        vectorized = vendor_performance_metrics(vendor_ids=vendor_ids, chunk_size=chunk_size)
+        vectorized_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        grouped = VendorProfile.bulk_performance_metrics(vendor_ids)
+        grouped_time = time.perf_counter() - started
+
+        matches = "match" if vectorized == grouped else "DIFFER"
+        self.stdout.write(
+            f"{rows} rows: vectorized {vectorized_time:.2f}s ({rows / vectorized_time:,.0f} rows/s), "
+            f"grouped query {grouped_time:.2f}s, results {matches}"
+        )
@@ -0,0 +1,65 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.users.models import VendorHistoricalPerformance, VendorMetricCheckpoint
+
+
+class Command(BaseCommand):
+    help = (
+        "Collapses runs of identical vendor performance snapshots and deletes "
+        "snapshots and metric checkpoints past the retention period. Rollups "
+        "are left untouched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--keep-days",
+            type=int,
+            default=settings.VENDOR_HISTORY_RETENTION_DAYS,
+            help="Delete snapshots and checkpoints older than this many days, 0 keeps all (VENDOR_HISTORY_RETENTION_DAYS)",
+        )
+        parser.add_argument(
+            "--vendors",
+            nargs="+",
+            help="Only compact the history of these vendor ids",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of snapshots read or deleted per statement",
+        )
+
+    def handle(self, *args, **options):
+        vendor_ids = options["vendors"]
+        batch_size = options["batch_size"]
+
+        purged = pruned = 0
+        if options["keep_days"] > 0:
+            before = timezone.now() - timedelta(days=options["keep_days"])
+            purged = VendorHistoricalPerformance.purge(
+                before, vendor_ids=vendor_ids, batch_size=batch_size
+            )
+            pruned = VendorMetricCheckpoint.purge(
+                before, vendor_ids=vendor_ids, batch_size=batch_size
+            )
+
+        if vendor_ids is None:
+            vendor_ids = list(
+                VendorHistoricalPerformance.objects.order_by()
+                .values_list("vendor_id", flat=True)
+                .distinct()
+            )
+        collapsed = 0
+        for vendor_id in vendor_ids:
+            collapsed += VendorHistoricalPerformance.collapse_runs(vendor_id, batch_size=batch_size)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Deleted {purged} expired and {collapsed} duplicate snapshot(s), "
+                f"{pruned} expired checkpoint(s)"
+            )
+        )
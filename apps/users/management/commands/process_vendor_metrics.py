@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.users.models import VendorMetricsQueue
+
+
+class Command(BaseCommand):
+    help = "Recomputes the performance snapshot of vendors queued by purchase order updates"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--window",
+            type=int,
+            default=5,
+            help="Seconds a vendor stays queued so further updates coalesce into one recomputation",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Seconds to sleep when the queue has nothing due",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Number of vendors processed per batch",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Process what is due and exit instead of running as a worker",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            processed = VendorMetricsQueue.process(
+                window=options["window"], batch_size=options["batch_size"]
+            )
+            if processed:
+                self.stdout.write(f"Recomputed metrics for {processed} vendor(s)")
+            if options["once"]:
+                if processed == options["batch_size"]:
+                    continue
+                break
+            if not processed:
+                time.sleep(options["interval"])
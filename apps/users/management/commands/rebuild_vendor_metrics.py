@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from apps.users.models import VendorMetricAccumulator
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the vendor metric running totals from the purchase orders"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--vendors",
+            nargs="+",
+            help="Only rebuild the totals of these vendor ids",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of vendor totals written per insert",
+        )
+
+    def handle(self, *args, **options):
+        rebuilt = VendorMetricAccumulator.rebuild(
+            vendor_ids=options["vendors"], batch_size=options["batch_size"]
+        )
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt metric totals for {rebuilt} vendor(s)"))
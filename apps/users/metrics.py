@@ -0,0 +1,160 @@
+from datetime import timedelta
+
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Cast, TruncDay
+from django.utils import timezone
+
+from apps.utils.enums import POStatusEnum
+
+ON_TIME_DELIVERY_WINDOW = timedelta(days=10)
+
+# Running totals every vendor metric is derived from.
+TOTAL_FIELDS = (
+    "total_po_count",
+    "completed_count",
+    "on_time_count",
+    "quality_rating_sum",
+    "response_time_sum",
+    "response_count",
+)
+
+METRIC_FIELDS = (
+    "on_time_delivery_rate",
+    "quality_rating_avg",
+    "average_response_time",
+    "fulfillment_rate",
+)
+
+# Purchase order columns a metric contribution depends on.
+CONTRIBUTION_FIELDS = (
+    "vendor_id",
+    "status",
+    "order_date",
+    "delivery_date",
+    "quality_rating",
+    "issue_date",
+    "acknowledgment_date",
+)
+
+
+def empty_totals():
+    return {field: 0 for field in TOTAL_FIELDS}
+
+
+def performance_totals(prefix=""):
+    """
+    Aggregate expressions computing the running totals over purchase orders.
+    `prefix` is the lookup path from the queried model to the purchase order.
+    """
+    completed = Q(**{f"{prefix}status": POStatusEnum.COMPLETED})
+    on_time = Q(
+        **{f"{prefix}delivery_date__lte": F(f"{prefix}order_date") + ON_TIME_DELIVERY_WINDOW}
+    )
+    responded = Q(
+        **{
+            f"{prefix}acknowledgment_date__isnull": False,
+            f"{prefix}issue_date__isnull": False,
+        }
+    )
+    return {
+        "total_po_count": Count(f"{prefix}id"),
+        "completed_count": Count(f"{prefix}id", filter=completed),
+        "on_time_count": Count(f"{prefix}id", filter=completed & on_time),
+        "quality_rating_sum": Sum(f"{prefix}quality_rating", filter=completed),
+        "response_time_sum": Sum(
+            TruncDay(f"{prefix}acknowledgment_date") - TruncDay(f"{prefix}issue_date"),
+            filter=completed & responded,
+        ),
+        "response_count": Count(f"{prefix}id", filter=completed & responded),
+    }
+
+
+def normalize_totals(row):
+    """
+    Converts an aggregate row into plain running totals, response time in days.
+    """
+    totals = empty_totals()
+    for field in TOTAL_FIELDS:
+        value = row.get(field)
+        if isinstance(value, timedelta):
+            value = value.total_seconds() / 86400
+        totals[field] = value or 0
+    return totals
+
+
+def metrics_from_totals(totals):
+    """
+    Derives the vendor performance metrics from running totals.
+    """
+    completed = totals["completed_count"]
+    total = totals["total_po_count"]
+    responded = totals["response_count"]
+    return {
+        "on_time_delivery_rate": round(totals["on_time_count"] / completed * 100, 2) if completed > 0 else 0,
+        "quality_rating_avg": round(totals["quality_rating_sum"] / completed, 2) if completed > 0 else 0,
+        "average_response_time": totals["response_time_sum"] / responded if responded > 0 else 0,  # in days
+        "fulfillment_rate": round(completed / total * 100, 2) if total > 0 else 0,
+    }
+
+
+def performance_metric_expressions(prefix=""):
+    """
+    SQL counterparts of metrics_from_totals, computed from the running totals
+    found at `prefix`. Rates are left unrounded so they can be ordered on.
+    """
+    return {
+        "on_time_delivery_rate": _ratio(f"{prefix}on_time_count", f"{prefix}completed_count", 100),
+        "quality_rating_avg": _ratio(f"{prefix}quality_rating_sum", f"{prefix}completed_count"),
+        "average_response_time": _ratio(f"{prefix}response_time_sum", f"{prefix}response_count"),
+        "fulfillment_rate": _ratio(f"{prefix}completed_count", f"{prefix}total_po_count", 100),
+    }
+
+
+def purchase_order_contribution(values):
+    """
+    Returns what a single purchase order adds to its vendor's running totals.
+    `values` maps CONTRIBUTION_FIELDS to the purchase order's column values.
+    """
+    totals = empty_totals()
+    totals["total_po_count"] = 1
+    if values["status"] != POStatusEnum.COMPLETED:
+        return totals
+
+    totals["completed_count"] = 1
+    totals["quality_rating_sum"] = values["quality_rating"] or 0
+    order_date, delivery_date = values["order_date"], values["delivery_date"]
+    if order_date and delivery_date and delivery_date <= order_date + ON_TIME_DELIVERY_WINDOW:
+        totals["on_time_count"] = 1
+
+    issue_date, acknowledgment_date = values["issue_date"], values["acknowledgment_date"]
+    if issue_date and acknowledgment_date:
+        response_time = _truncate_day(acknowledgment_date) - _truncate_day(issue_date)
+        totals["response_time_sum"] = response_time.days
+        totals["response_count"] = 1
+    return totals
+
+
+def contribution_delta(old, new):
+    """
+    Field-wise difference between two contributions, None meaning no contribution.
+    """
+    old = old or empty_totals()
+    new = new or empty_totals()
+    return {field: new[field] - old[field] for field in TOTAL_FIELDS}
+
+
+def _truncate_day(value):
+    if timezone.is_aware(value):
+        value = timezone.localtime(value)
+    return value.date()
+
+
+def _ratio(numerator, denominator, scale=1):
+    return Case(
+        When(
+            **{f"{denominator}__gt": 0},
+            then=Cast(numerator, FloatField()) * Value(float(scale)) / F(denominator),
+        ),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
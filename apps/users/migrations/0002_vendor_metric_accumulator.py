@@ -0,0 +1,66 @@
+# Generated by Django 4.2 on 2026-10-17 23:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+from apps.users.metrics import TOTAL_FIELDS, normalize_totals, performance_totals
+
+
+def populate_accumulators(apps, schema_editor):
+    VendorProfile = apps.get_model("users", "VendorProfile")
+    VendorMetricAccumulator = apps.get_model("users", "VendorMetricAccumulator")
+    rows = (
+        VendorProfile.objects.order_by()
+        .annotate(**performance_totals("purchaseorder__"))
+        .values("id", *TOTAL_FIELDS)
+    )
+    VendorMetricAccumulator.objects.bulk_create(
+        [VendorMetricAccumulator(vendor_id=row["id"], **normalize_totals(row)) for row in rows],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0001_initial"),
+        ("purchase_orders", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="VendorMetricAccumulator",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("total_po_count", models.IntegerField(default=0)),
+                ("completed_count", models.IntegerField(default=0)),
+                ("on_time_count", models.IntegerField(default=0)),
+                ("quality_rating_sum", models.FloatField(default=0.0)),
+                ("response_time_sum", models.FloatField(default=0.0)),
+                ("response_count", models.IntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "vendor",
+                    models.OneToOneField(
+                        editable=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="metric_accumulator",
+                        to="users.vendorprofile",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "vendor_metric_accumulator",
+            },
+        ),
+        migrations.RunPython(populate_accumulators, migrations.RunPython.noop),
+    ]
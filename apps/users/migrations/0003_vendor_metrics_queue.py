@@ -0,0 +1,49 @@
+# Generated by Django 4.2 on 2026-10-17 23:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0002_vendor_metric_accumulator"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="VendorMetricsQueue",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "dirty_since",
+                    models.DateTimeField(
+                        db_index=True, default=django.utils.timezone.now
+                    ),
+                ),
+                (
+                    "vendor",
+                    models.OneToOneField(
+                        editable=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="metrics_queue",
+                        to="users.vendorprofile",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "vendor_metrics_queue",
+                "ordering": ("dirty_since",),
+            },
+        ),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 4.2 on 2026-10-17 23:19
+
+from django.db import migrations, models
+from django.db.models.functions import Trunc
+import django.db.models.deletion
+import uuid
+
+from apps.users.metrics import METRIC_FIELDS
+from apps.utils.enums import PerformanceResolutionEnum
+
+
+def populate_rollups(apps, schema_editor):
+    VendorHistoricalPerformance = apps.get_model("users", "VendorHistoricalPerformance")
+    VendorPerformanceRollup = apps.get_model("users", "VendorPerformanceRollup")
+    for resolution in PerformanceResolutionEnum.rollups():
+        rows = (
+            VendorHistoricalPerformance.objects.order_by()
+            .annotate(bucket=Trunc("date", resolution, output_field=models.DateField()))
+            .values("vendor_id", "bucket")
+            .annotate(
+                sample_count=models.Count("id"),
+                **{f"{field}_sum": models.Sum(field) for field in METRIC_FIELDS},
+            )
+        )
+        VendorPerformanceRollup.objects.bulk_create(
+            [VendorPerformanceRollup(resolution=resolution, **row) for row in rows],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0003_vendor_metrics_queue"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="VendorPerformanceRollup",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "resolution",
+                    models.CharField(
+                        choices=[
+                            ("raw", "Raw"),
+                            ("day", "Day"),
+                            ("week", "Week"),
+                            ("month", "Month"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("bucket", models.DateField()),
+                ("sample_count", models.PositiveIntegerField(default=0)),
+                ("on_time_delivery_rate_sum", models.FloatField(default=0.0)),
+                ("quality_rating_avg_sum", models.FloatField(default=0.0)),
+                ("average_response_time_sum", models.FloatField(default=0.0)),
+                ("fulfillment_rate_sum", models.FloatField(default=0.0)),
+            ],
+            options={
+                "db_table": "vendor_performance_rollup",
+                "ordering": ("bucket",),
+            },
+        ),
+        migrations.AddIndex(
+            model_name="vendorhistoricalperformance",
+            index=models.Index(
+                fields=["vendor", "date"], name="vendor_history_date_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="vendorperformancerollup",
+            name="vendor",
+            field=models.ForeignKey(
+                editable=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="performance_rollups",
+                to="users.vendorprofile",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="vendorperformancerollup",
+            constraint=models.UniqueConstraint(
+                fields=("vendor", "resolution", "bucket"),
+                name="unique_vendor_performance_rollup",
+            ),
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
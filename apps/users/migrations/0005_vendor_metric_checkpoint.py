@@ -0,0 +1,56 @@
+# Generated by Django 4.2 on 2026-10-17 23:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0004_vendor_performance_rollup"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="VendorMetricCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("date", models.DateTimeField(default=django.utils.timezone.now)),
+                ("total_po_count", models.IntegerField(default=0)),
+                ("completed_count", models.IntegerField(default=0)),
+                ("on_time_count", models.IntegerField(default=0)),
+                ("quality_rating_sum", models.FloatField(default=0.0)),
+                ("response_time_sum", models.FloatField(default=0.0)),
+                ("response_count", models.IntegerField(default=0)),
+                (
+                    "vendor",
+                    models.ForeignKey(
+                        editable=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="metric_checkpoints",
+                        to="users.vendorprofile",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "vendor_metric_checkpoint",
+                "ordering": ("-date",),
+            },
+        ),
+        migrations.AddIndex(
+            model_name="vendormetriccheckpoint",
+            index=models.Index(
+                fields=["vendor", "date"], name="vendor_checkpoint_date_idx"
+            ),
+        ),
+    ]
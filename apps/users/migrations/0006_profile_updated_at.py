@@ -0,0 +1,26 @@
+# Generated by Django 4.2 on 2026-10-17 23:58
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0005_vendor_metric_checkpoint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="buyersettings",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="vendorprofile",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
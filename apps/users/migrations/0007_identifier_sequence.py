@@ -0,0 +1,33 @@
+# Generated by Django 4.2 on 2026-10-18 00:03
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0006_profile_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IdentifierSequence",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("name", models.CharField(max_length=255, unique=True)),
+                ("next_value", models.BigIntegerField(default=0)),
+            ],
+            options={
+                "db_table": "identifier_sequence",
+            },
+        ),
+    ]
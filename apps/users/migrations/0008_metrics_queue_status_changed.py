@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-18 00:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0007_identifier_sequence"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="vendormetricsqueue",
+            name="status_changed",
+            field=models.BooleanField(default=False),
+        ),
+    ]
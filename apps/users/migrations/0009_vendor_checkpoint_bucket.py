@@ -0,0 +1,48 @@
+# Generated by Django 4.2 on 2026-10-18 01:10
+
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_buckets(apps, schema_editor):
+    VendorMetricCheckpoint = apps.get_model("users", "VendorMetricCheckpoint")
+    interval = max(settings.VENDOR_CHECKPOINT_INTERVAL, 1)
+    latest = {}
+    for checkpoint in VendorMetricCheckpoint.objects.order_by("vendor_id", "date", "id").iterator():
+        seconds = int(checkpoint.date.timestamp()) // interval * interval
+        checkpoint.bucket = datetime.fromtimestamp(seconds, tz=timezone.utc)
+        previous = latest.get((checkpoint.vendor_id, checkpoint.bucket))
+        if previous is not None:
+            # the last checkpoint of a bucket supersedes the earlier ones
+            previous.delete()
+        checkpoint.save(update_fields=["bucket"])
+        latest[(checkpoint.vendor_id, checkpoint.bucket)] = checkpoint
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0008_metrics_queue_status_changed"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="vendormetriccheckpoint",
+            name="bucket",
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.RunPython(fill_buckets, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="vendormetriccheckpoint",
+            name="bucket",
+            field=models.DateTimeField(editable=False),
+        ),
+        migrations.AddConstraint(
+            model_name="vendormetriccheckpoint",
+            constraint=models.UniqueConstraint(
+                fields=("vendor", "bucket"), name="vendor_checkpoint_bucket_unique"
+            ),
+        ),
+    ]
@@ -1,13 +1,28 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.apps import apps
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, router, transaction
 
-from datetime import  timedelta
-from django.db.models import Avg, F
-from django.db.models.functions import TruncDay
+from django.db.models import Count, Exists, F, OuterRef, Q, Sum
+from django.db.models.functions import Coalesce, Trunc
+from django.utils import timezone
 
+from apps.users.metrics import (
+    CONTRIBUTION_FIELDS,
+    METRIC_FIELDS,
+    TOTAL_FIELDS,
+    empty_totals,
+    metrics_from_totals,
+    normalize_totals,
+    performance_metric_expressions,
+    performance_totals,
+    purchase_order_contribution,
+)
 from apps.utils.abstracts import AbstractUUID
 from apps.utils.country.countries import country_codes
-from apps.utils.enums import POStatusEnum
+from apps.utils.enums import PerformanceResolutionEnum, POStatusEnum
 
 class User(AbstractUser, AbstractUUID):
     """
@@ -40,8 +55,10 @@ class User(AbstractUser, AbstractUUID):
         return f"{self.mobile} {self.get_full_name()} {self.id} {self.group()}"
 
     def group(self):
-        if self.groups.all().count():
-            return self.groups.all().first().name
+        # evaluating all() reuses prefetched groups instead of querying again
+        groups = list(self.groups.all())
+        if groups:
+            return min(groups, key=lambda group: group.pk).name
         else:
             return "buyer"
 
@@ -60,6 +77,7 @@ class BuyerSettings(AbstractUUID):
         editable=False
     )
     business_name = models.CharField(max_length=255, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, editable=False)
     # interests
 
     def __str__(self):
@@ -72,6 +90,26 @@ class BuyerSettings(AbstractUUID):
         verbose_name_plural = "Buyer Settings"
 
 
+class VendorProfileQuerySet(models.QuerySet):
+    def with_performance_totals(self):
+        """
+        Annotates each vendor with its purchase order running totals, grouped
+        in a single query.
+        """
+        return self.order_by().annotate(**performance_totals("purchaseorder__"))
+
+    def with_performance_metrics(self):
+        """
+        Annotates each vendor with its performance metrics, read from the
+        running totals so no purchase order is scanned.
+        """
+        return self.annotate(
+            total_po_count=Coalesce(F("metric_accumulator__total_po_count"), 0),
+            completed_count=Coalesce(F("metric_accumulator__completed_count"), 0),
+            **performance_metric_expressions("metric_accumulator__"),
+        )
+
+
 class VendorProfile(AbstractUUID):
     """
     VENDOR PROFILE
@@ -87,62 +125,35 @@ class VendorProfile(AbstractUUID):
     )
     vendor_code = models.CharField(max_length=255, null=True, blank=True, unique=True, editable=False)
     business_name = models.CharField(max_length=255, null=True, blank=True, unique=True)
+    updated_at = models.DateTimeField(auto_now=True, editable=False)
 
-    def calculate_on_time_delivery_rate(self, completed_pos):
-        """
-        Calculate the on-time delivery rate for the vendor.
-        """
-        total_completed_pos = completed_pos.count()
-        on_time_pos = completed_pos.filter(delivery_date__lte=F('order_date') + timedelta(days=10))
-        on_time_delivery_rate = (on_time_pos.count() / total_completed_pos) * 100 if total_completed_pos > 0 else 0
-        return on_time_delivery_rate
-
-    def calculate_quality_rating_avg(self, completed_pos):
-        """
-        Calculate the average quality rating for the vendor.
-        """
-        quality_rating_avg = completed_pos.aggregate(avg_quality_rating=Avg('quality_rating'))['avg_quality_rating'] or 0
-        return quality_rating_avg
+    objects = VendorProfileQuerySet.as_manager()
 
-    def calculate_avg_response_time(self, completed_pos):
+    @property
+    def calculate_performance_metrics(self):
         """
-        Calculate the average response time for the vendor.
+        The vendor's performance metrics, from the running totals kept up to
+        date as purchase orders are written.
         """
-        avg_response_time = completed_pos.annotate(
-            response_time=TruncDay(F('acknowledgment_date')) - TruncDay(F('issue_date'))
-        ).aggregate(avg_response_time=Avg('response_time'))['avg_response_time'] or 0
-        return avg_response_time
+        return VendorMetricAccumulator.for_vendor(self.id).metrics
 
-    def calculate_fulfillment_rate(self, completed_pos, total_pos):
+    @property
+    def aggregate_performance_metrics(self):
         """
-        Calculate the fulfillment rate for the vendor.
+        Calculate the performance metrics from the vendor's purchase orders in
+        a single query, what the running totals are checked against.
         """
-        fulfilled_pos = completed_pos.filter(status=POStatusEnum.COMPLETED)
-        fulfillment_rate = (fulfilled_pos.count() / total_pos) * 100 if total_pos > 0 else 0
-        return fulfillment_rate
+        totals = self.purchaseorder.order_by().aggregate(**performance_totals())
+        return metrics_from_totals(normalize_totals(totals))
 
-    @property
-    def calculate_performance_metrics(self):
+    @classmethod
+    def bulk_performance_metrics(cls, vendor_ids):
         """
-        Calculate the performance metrics for the vendor.
+        Calculate the performance metrics of many vendors in one grouped query.
+        Returns a dictionary of metrics keyed by vendor id.
         """
-        try:
-            completed_pos = self.purchaseorder.filter(status=POStatusEnum.COMPLETED).select_related('vendor')
-
-            on_time_delivery_rate = self.calculate_on_time_delivery_rate(completed_pos)
-            quality_rating_avg = self.calculate_quality_rating_avg(completed_pos)
-            avg_response_time = self.calculate_avg_response_time(completed_pos).total_seconds() / 86400
-            total_pos = self.purchaseorder.all().count()
-            fulfillment_rate = self.calculate_fulfillment_rate(completed_pos, total_pos)
-
-            return{
-                "on_time_delivery_rate": round(on_time_delivery_rate, 2),
-                "quality_rating_avg": round(quality_rating_avg, 2),
-                "average_response_time": avg_response_time,  # convert to days
-                "fulfillment_rate": round(fulfillment_rate, 2)
-            }
-        except Exception as e:
-            raise Exception(e)
+        rows = cls.objects.filter(id__in=vendor_ids).with_performance_totals().values("id", *TOTAL_FIELDS)
+        return {row["id"]: metrics_from_totals(normalize_totals(row)) for row in rows}
 
 
 class VendorHistoricalPerformance(AbstractUUID):
@@ -167,4 +178,521 @@ class VendorHistoricalPerformance(AbstractUUID):
     def __str__(self):
         return str(self.date)
     class Meta:
-        ordering = ["-date"]
\ No newline at end of file
+        ordering = ["-date"]
+        indexes = [
+            models.Index(fields=["vendor", "date"], name="vendor_history_date_idx"),
+        ]
+
+    @classmethod
+    def record(cls, vendor_id, metrics, date=None, only_changes=False):
+        """
+        Stores a snapshot of the vendor's performance metrics. With
+        `only_changes`, nothing is stored when the metrics equal the vendor's
+        latest snapshot.
+        """
+        if only_changes:
+            latest = (
+                cls.objects.filter(vendor_id=vendor_id)
+                .order_by("-date")
+                .values(*METRIC_FIELDS)
+                .first()
+            )
+            if latest == {field: metrics[field] for field in METRIC_FIELDS}:
+                return None
+        snapshot = cls.objects.create(
+            vendor_id=vendor_id,
+            date=date or timezone.now(),
+            on_time_delivery_rate=metrics["on_time_delivery_rate"],
+            quality_rating_avg=metrics["quality_rating_avg"],
+            average_response_time=metrics["average_response_time"],
+            fulfillment_rate=metrics["fulfillment_rate"],
+        )
+        VendorPerformanceRollup.add(snapshot)
+        return snapshot
+
+    @classmethod
+    def replay(cls, vendor_id, batch_size=1000):
+        """
+        Rebuilds the vendor's snapshots by replaying its purchase orders in
+        the order they were last written, taking a snapshot after every
+        completed one. Replaces the vendor's history, rollups and metric
+        checkpoints and returns the number of snapshots written.
+        """
+        PurchaseOrder = apps.get_model("purchase_orders.PurchaseOrder")
+        purchase_orders = (
+            PurchaseOrder.objects.filter(vendor_id=vendor_id)
+            .order_by("updated_at", "id")
+            .values("updated_at", *CONTRIBUTION_FIELDS)
+        )
+
+        totals, previous, written = empty_totals(), None, 0
+        snapshots, checkpoints, checkpoint = [], [], None
+        with transaction.atomic():
+            cls.objects.filter(vendor_id=vendor_id).delete()
+            VendorMetricCheckpoint.objects.filter(vendor_id=vendor_id).delete()
+            for row in purchase_orders.iterator(chunk_size=batch_size):
+                for field, value in purchase_order_contribution(row).items():
+                    totals[field] += value
+                bucket = VendorMetricCheckpoint.bucket_of(row["updated_at"])
+                if checkpoint is not None and checkpoint.bucket != bucket:
+                    checkpoints.append(checkpoint)
+                # the last purchase order of a bucket makes its checkpoint
+                checkpoint = VendorMetricCheckpoint(
+                    vendor_id=vendor_id, bucket=bucket, date=row["updated_at"], **totals
+                )
+                if row["status"] == POStatusEnum.COMPLETED:
+                    metrics = metrics_from_totals(totals)
+                    if metrics != previous:
+                        snapshots.append(cls(vendor_id=vendor_id, date=row["updated_at"], **metrics))
+                    previous = metrics
+                if len(checkpoints) >= batch_size:
+                    VendorMetricCheckpoint.objects.bulk_create(checkpoints)
+                    checkpoints = []
+                if len(snapshots) >= batch_size:
+                    written += len(cls.objects.bulk_create(snapshots))
+                    snapshots = []
+            if checkpoint is not None:
+                checkpoints.append(checkpoint)
+            VendorMetricCheckpoint.objects.bulk_create(checkpoints)
+            written += len(cls.objects.bulk_create(snapshots))
+            VendorPerformanceRollup.rebuild(vendor_ids=[vendor_id])
+        return written
+
+    @classmethod
+    def collapse_runs(cls, vendor_id, batch_size=1000):
+        """
+        Deletes snapshots repeating the metrics of the snapshot right before
+        them, keeping the first of every run. Walks the vendor's history in
+        keyset batches so each statement stays short. Returns the number of
+        snapshots deleted.
+        """
+        deleted, previous, last = 0, None, None
+        history = cls.objects.filter(vendor_id=vendor_id).order_by("date", "id")
+        while True:
+            batch = history
+            if last is not None:
+                batch = batch.filter(Q(date__gt=last[0]) | Q(date=last[0], id__gt=last[1]))
+            rows = list(batch.values_list("id", "date", *METRIC_FIELDS)[:batch_size])
+            if not rows:
+                return deleted
+            duplicates = []
+            for row in rows:
+                if row[2:] == previous:
+                    duplicates.append(row[0])
+                previous = row[2:]
+            if duplicates:
+                deleted += cls.objects.filter(id__in=duplicates).delete()[0]
+            last = rows[-1][1], rows[-1][0]
+
+    @classmethod
+    def purge(cls, before, vendor_ids=None, batch_size=1000):
+        """
+        Deletes snapshots older than `before` in batches. The rollups keep
+        their aggregates. Returns the number of snapshots deleted.
+        """
+        expired = cls.objects.filter(date__lt=before)
+        if vendor_ids is not None:
+            expired = expired.filter(vendor_id__in=vendor_ids)
+        deleted = 0
+        while True:
+            ids = list(expired.order_by().values_list("id", flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            deleted += cls.objects.filter(id__in=ids).delete()[0]
+
+
+class VendorPerformanceRollup(AbstractUUID):
+    """
+    VENDOR PERFORMANCE ROLLUP
+    Daily, weekly and monthly aggregates of the performance snapshots,
+    maintained as snapshots are recorded.
+    """
+
+    vendor = models.ForeignKey(
+        VendorProfile,
+        on_delete=models.CASCADE,
+        related_name="performance_rollups",
+        editable=False
+    )
+    resolution = models.CharField(max_length=10, choices=PerformanceResolutionEnum.choices())
+    bucket = models.DateField()
+    sample_count = models.PositiveIntegerField(default=0)
+    on_time_delivery_rate_sum = models.FloatField(default=0.0)
+    quality_rating_avg_sum = models.FloatField(default=0.0)
+    average_response_time_sum = models.FloatField(default=0.0)
+    fulfillment_rate_sum = models.FloatField(default=0.0)
+
+    def __str__(self):
+        return f"{self.resolution} {self.bucket}"
+
+    class Meta:
+        db_table = "vendor_performance_rollup"
+        ordering = ("bucket",)
+        constraints = [
+            models.UniqueConstraint(
+                fields=["vendor", "resolution", "bucket"], name="unique_vendor_performance_rollup"
+            ),
+        ]
+
+    @property
+    def metrics(self):
+        """
+        Average of the snapshots recorded in the bucket.
+        """
+        return {
+            field: getattr(self, f"{field}_sum") / self.sample_count if self.sample_count else 0
+            for field in METRIC_FIELDS
+        }
+
+    @staticmethod
+    def bucket_start(resolution, day):
+        if resolution == PerformanceResolutionEnum.WEEK:
+            return day - timedelta(days=day.weekday())
+        if resolution == PerformanceResolutionEnum.MONTH:
+            return day.replace(day=1)
+        return day
+
+    @classmethod
+    def add(cls, snapshot):
+        """
+        Adds a snapshot to the bucket of every resolution.
+        """
+        day = timezone.localtime(snapshot.date).date()
+        changes = {"sample_count": F("sample_count") + 1}
+        changes.update(
+            {f"{field}_sum": F(f"{field}_sum") + getattr(snapshot, field) for field in METRIC_FIELDS}
+        )
+        for resolution in PerformanceResolutionEnum.rollups():
+            lookup = dict(
+                vendor_id=snapshot.vendor_id,
+                resolution=resolution,
+                bucket=cls.bucket_start(resolution, day),
+            )
+            if not cls.objects.filter(**lookup).update(**changes):
+                cls.objects.get_or_create(**lookup)
+                cls.objects.filter(**lookup).update(**changes)
+
+    @classmethod
+    def rebuild(cls, vendor_ids=None):
+        """
+        Regroups the rollups of the vendors from their recorded snapshots.
+        """
+        with transaction.atomic():
+            rollups = cls.objects.all()
+            snapshots = VendorHistoricalPerformance.objects.order_by()
+            if vendor_ids is not None:
+                rollups = rollups.filter(vendor_id__in=vendor_ids)
+                snapshots = snapshots.filter(vendor_id__in=vendor_ids)
+            rollups.delete()
+            for resolution in PerformanceResolutionEnum.rollups():
+                rows = (
+                    snapshots.annotate(bucket=Trunc("date", resolution, output_field=models.DateField()))
+                    .values("vendor_id", "bucket")
+                    .annotate(
+                        sample_count=Count("id"),
+                        **{f"{field}_sum": Sum(field) for field in METRIC_FIELDS},
+                    )
+                )
+                cls.objects.bulk_create(
+                    (cls(resolution=resolution, **row) for row in rows.iterator()),
+                    batch_size=1000,
+                )
+
+
+class VendorMetricAccumulator(AbstractUUID):
+    """
+    VENDOR METRIC ACCUMULATOR
+    Running totals of a vendor's purchase orders, kept in step with every
+    purchase order create, update and delete.
+    """
+
+    vendor = models.OneToOneField(
+        VendorProfile,
+        on_delete=models.CASCADE,
+        related_name="metric_accumulator",
+        editable=False
+    )
+    total_po_count = models.IntegerField(default=0)
+    completed_count = models.IntegerField(default=0)
+    on_time_count = models.IntegerField(default=0)
+    quality_rating_sum = models.FloatField(default=0.0)
+    response_time_sum = models.FloatField(default=0.0)  # in days
+    response_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True, editable=False)
+
+    def __str__(self):
+        return f"{self.vendor_id}"
+
+    class Meta:
+        db_table = "vendor_metric_accumulator"
+
+    @property
+    def totals(self):
+        return {field: getattr(self, field) for field in TOTAL_FIELDS}
+
+    @property
+    def metrics(self):
+        """
+        Performance metrics derived from the running totals.
+        """
+        return metrics_from_totals(self.totals)
+
+    @classmethod
+    def apply_delta(cls, vendor_id, delta):
+        """
+        Adds `delta` to the vendor's running totals in a single UPDATE.
+        """
+        changes = {field: F(field) + value for field, value in delta.items() if value}
+        if not changes:
+            return False
+        # queryset updates skip auto_now, conditional requests rely on it
+        changes["updated_at"] = timezone.now()
+        if not cls.objects.filter(vendor_id=vendor_id).update(**changes):
+            cls.objects.get_or_create(vendor_id=vendor_id)
+            cls.objects.filter(vendor_id=vendor_id).update(**changes)
+        VendorMetricCheckpoint.capture(vendor_id)
+        return True
+
+    @classmethod
+    def for_vendor(cls, vendor_id):
+        """
+        Returns the vendor's running totals, rebuilding them when missing.
+        """
+        accumulator = cls.objects.filter(vendor_id=vendor_id).first()
+        if accumulator is None:
+            cls.rebuild(vendor_ids=[vendor_id])
+            accumulator = cls.objects.get(vendor_id=vendor_id)
+        return accumulator
+
+    @classmethod
+    def rebuild(cls, vendor_ids=None, batch_size=1000):
+        """
+        Recomputes the running totals from the purchase orders, one grouped
+        query for all vendors. Returns the number of vendors rebuilt.
+        """
+        vendors = VendorProfile.objects.all()
+        if vendor_ids is not None:
+            vendors = vendors.filter(id__in=vendor_ids)
+        rows = vendors.with_performance_totals().values("id", *TOTAL_FIELDS)
+
+        rebuilt = 0
+        with transaction.atomic():
+            accumulators = cls.objects.all()
+            if vendor_ids is not None:
+                accumulators = accumulators.filter(vendor_id__in=vendor_ids)
+            accumulators.delete()
+
+            batch = []
+            for row in rows.iterator(chunk_size=batch_size):
+                batch.append(cls(vendor_id=row["id"], **normalize_totals(row)))
+                if len(batch) >= batch_size:
+                    cls.objects.bulk_create(batch)
+                    rebuilt += len(batch)
+                    batch = []
+            cls.objects.bulk_create(batch)
+            rebuilt += len(batch)
+        return rebuilt
+
+
+class VendorMetricCheckpoint(AbstractUUID):
+    """
+    VENDOR METRIC CHECKPOINT
+    The vendor's cumulative running totals after the last purchase order
+    change of each VENDOR_CHECKPOINT_INTERVAL bucket, so the metrics as of
+    any instant are one index seek away.
+    """
+
+    vendor = models.ForeignKey(
+        VendorProfile,
+        on_delete=models.CASCADE,
+        related_name="metric_checkpoints",
+        editable=False
+    )
+    bucket = models.DateTimeField(editable=False)
+    date = models.DateTimeField(default=timezone.now)
+    total_po_count = models.IntegerField(default=0)
+    completed_count = models.IntegerField(default=0)
+    on_time_count = models.IntegerField(default=0)
+    quality_rating_sum = models.FloatField(default=0.0)
+    response_time_sum = models.FloatField(default=0.0)  # in days
+    response_count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return str(self.date)
+
+    class Meta:
+        db_table = "vendor_metric_checkpoint"
+        ordering = ("-date",)
+        indexes = [
+            models.Index(fields=["vendor", "date"], name="vendor_checkpoint_date_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["vendor", "bucket"], name="vendor_checkpoint_bucket_unique"),
+        ]
+
+    @staticmethod
+    def bucket_of(date):
+        """
+        Start of the VENDOR_CHECKPOINT_INTERVAL bucket `date` falls in.
+        """
+        interval = max(settings.VENDOR_CHECKPOINT_INTERVAL, 1)
+        seconds = int(date.timestamp()) // interval * interval
+        return datetime.fromtimestamp(seconds, tz=dt_timezone.utc)
+
+    @classmethod
+    def capture(cls, vendor_id):
+        """
+        Records the vendor's current running totals, overwriting the
+        checkpoint of the current bucket if there is one.
+        """
+        totals = VendorMetricAccumulator.objects.filter(vendor_id=vendor_id).values(*TOTAL_FIELDS).first()
+        if totals is not None:
+            now = timezone.now()
+            cls.objects.bulk_create(
+                [cls(vendor_id=vendor_id, bucket=cls.bucket_of(now), date=now, **totals)],
+                update_conflicts=True,
+                unique_fields=["vendor", "bucket"],
+                update_fields=["date", *TOTAL_FIELDS],
+            )
+
+    @classmethod
+    def metrics_as_of(cls, vendor_id, date):
+        """
+        Performance metrics of the vendor as they stood at `date`, read from
+        the latest checkpoint at or before it through the (vendor, date) index.
+        Returns None when `date` is older than the vendor's first checkpoint.
+        """
+        totals = (
+            cls.objects.filter(vendor_id=vendor_id, date__lte=date)
+            .order_by("-date")
+            .values(*TOTAL_FIELDS)
+            .first()
+        )
+        if totals is None:
+            return None
+        return metrics_from_totals(totals)
+
+    @classmethod
+    def purge(cls, before, vendor_ids=None, batch_size=1000):
+        """
+        Deletes checkpoints older than `before` in batches, keeping each
+        vendor's latest one before it so metrics as of any later instant
+        still resolve. Returns the number of checkpoints deleted.
+        """
+        expired = cls.objects.filter(date__lt=before).filter(
+            Exists(
+                cls.objects.filter(
+                    vendor_id=OuterRef("vendor_id"),
+                    date__gt=OuterRef("date"),
+                    date__lt=before,
+                )
+            )
+        )
+        if vendor_ids is not None:
+            expired = expired.filter(vendor_id__in=vendor_ids)
+        deleted = 0
+        while True:
+            ids = list(expired.order_by().values_list("id", flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            deleted += cls.objects.filter(id__in=ids).delete()[0]
+
+
+class VendorMetricsQueue(AbstractUUID):
+    """
+    VENDOR METRICS QUEUE
+    Vendors whose performance snapshot is due for recomputation. A vendor
+    has at most one pending entry, so bursts of purchase order updates
+    collapse into a single recomputation.
+    """
+
+    vendor = models.OneToOneField(
+        VendorProfile,
+        on_delete=models.CASCADE,
+        related_name="metrics_queue",
+        editable=False
+    )
+    dirty_since = models.DateTimeField(default=timezone.now, db_index=True)
+    # a purchase order changed status, which is snapshotted even without a metric change
+    status_changed = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f"{self.vendor_id}"
+
+    class Meta:
+        db_table = "vendor_metrics_queue"
+        ordering = ("dirty_since",)
+
+    @classmethod
+    def mark_dirty(cls, vendor_ids, status_changed=False):
+        """
+        Flags the vendors for recomputation in a single INSERT, leaving
+        vendors that are already pending untouched apart from flagging
+        their status change.
+        """
+        entries = [cls(vendor_id=vendor_id, status_changed=status_changed) for vendor_id in set(vendor_ids)]
+        if status_changed:
+            cls.objects.bulk_create(
+                entries, update_conflicts=True, unique_fields=["vendor"], update_fields=["status_changed"]
+            )
+        else:
+            cls.objects.bulk_create(entries, ignore_conflicts=True)
+
+    @classmethod
+    def process(cls, window=0, batch_size=100):
+        """
+        Recomputes the snapshot of vendors that have been dirty for at least
+        `window` seconds. Returns the number of vendors processed.
+        """
+        due = cls.objects.filter(dirty_since__lte=timezone.now() - timedelta(seconds=window))
+        processed = 0
+        for entry in due[:batch_size]:
+            # claim the entry first, an update arriving meanwhile queues the vendor again
+            if not cls.objects.filter(pk=entry.pk).delete()[0]:
+                continue
+            accumulator = VendorMetricAccumulator.for_vendor(entry.vendor_id)
+            VendorHistoricalPerformance.record(
+                entry.vendor_id, accumulator.metrics, only_changes=not entry.status_changed
+            )
+            processed += 1
+        return processed
+
+
+class IdentifierSequence(AbstractUUID):
+    """
+    IDENTIFIER SEQUENCE
+    Next number of a named identifier sequence. Processes reserve numbers a
+    block at a time and format them into identifiers themselves.
+    """
+
+    name = models.CharField(max_length=255, unique=True)
+    next_value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        db_table = "identifier_sequence"
+
+    @classmethod
+    def in_transaction(cls):
+        """
+        Whether a reservation made now would join the caller's transaction
+        rather than commit straight away.
+        """
+        return transaction.get_connection(router.db_for_write(cls)).in_atomic_block
+
+    @classmethod
+    def reserve(cls, name, count):
+        """
+        Reserves `count` consecutive numbers of the sequence and returns the
+        first. Outside a transaction the reservation commits at once, so the
+        row is locked only while reserving; reserve before entering atomic()
+        to keep it that way, see save_with_identifier.
+        """
+        # the row lock taken by the UPDATE keeps concurrent reservations from overlapping
+        sequences = cls.objects.using(router.db_for_write(cls))
+        with transaction.atomic(using=sequences.db):
+            sequences.bulk_create([cls(name=name)], ignore_conflicts=True)
+            sequences.filter(name=name).update(next_value=F("next_value") + count)
+            return sequences.values_list("next_value", flat=True).get(name=name) - count
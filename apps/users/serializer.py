@@ -1,23 +1,34 @@
 import logging
 
 from django.contrib.auth.models import Group
+from django.utils import timezone
 from rest_framework import serializers
 
-from apps.users.models import BuyerSettings, User, VendorProfile
-from apps.utils.constant import DATETIME_FORMAT
+from apps.users.models import (
+    BuyerSettings,
+    User,
+    VendorHistoricalPerformance,
+    VendorPerformanceRollup,
+    VendorProfile,
+)
+from apps.utils.constant import DATE_FORMAT, DATETIME_FORMAT
+from apps.utils.counting import invalidate_counts
 from apps.utils.enums import UserGroup
+from apps.utils.fieldsets import ExpandableFieldsMixin
+from apps.utils.identifiers import save_with_identifier
 from apps.utils.random_number_generator import unique_alpha_numeric_generator, generate_uuid
 
 logger = logging.getLogger("users")
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for User model.
     """
 
     joined_at = serializers.DateTimeField(format=DATETIME_FORMAT, read_only=True)
     group = serializers.CharField(read_only=True)
+    field_prefetches = {"group": "groups"}
 
     class Meta:
         model = User
@@ -115,7 +126,11 @@ class BuyerFormSerializer(serializers.Serializer):
         Update method for BuyerFormSerializer.
         """
         if validated_data.get("settings"):
-            _ = BuyerSettings.objects.filter(id=instance.id).update(**validated_data.get("settings"))
+            _ = BuyerSettings.objects.filter(id=instance.id).update(
+                **validated_data.get("settings"), updated_at=timezone.now()
+            )
+            # queryset updates send no post_save to bump the cached list counts
+            invalidate_counts(BuyerSettings)
         instance.refresh_from_db()
         if validated_data.get("user"):
             for k, v in validated_data.get("user").items():
@@ -231,12 +246,15 @@ class VendorRegistrationSerializer(serializers.Serializer):
         instance.set_password(validated_data.get("password"))
         instance.save()
         group, _ = Group.objects.get_or_create(name=UserGroup.VENDOR)
-        _ = VendorProfile.objects.create(
-            **{
-                "user": instance,
-                "vendor_code": unique_alpha_numeric_generator(VendorProfile, "vendor_code", 8),
-                "business_name": validated_data.get("business_name")
-            }
+        _ = save_with_identifier(
+            lambda vendor_code: VendorProfile.objects.create(
+                **{
+                    "user": instance,
+                    "vendor_code": vendor_code,
+                    "business_name": validated_data.get("business_name")
+                }
+            ),
+            lambda: unique_alpha_numeric_generator(VendorProfile, "vendor_code", 8),
         )
         instance.groups.add(group)
         instance.save()
@@ -259,18 +277,49 @@ class VendorRegistrationSerializer(serializers.Serializer):
         return attrs
 
 
-class VendorSerializer(serializers.ModelSerializer):
+class VendorSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for VendorProfile model.
     """
 
-    user = UserSerializer(read_only=True)
+    expandable_fields = {"user": (UserSerializer, {})}
+    default_expand = ("user",)
 
     class Meta:
         model = VendorProfile
         fields = "__all__"
 
 
+class VendorPerformanceSerializer(serializers.ModelSerializer):
+    """
+    Serializer for vendors annotated with their performance metrics.
+    """
+
+    total_po_count = serializers.IntegerField(read_only=True)
+    completed_count = serializers.IntegerField(read_only=True)
+    on_time_delivery_rate = serializers.SerializerMethodField()
+    quality_rating_avg = serializers.SerializerMethodField()
+    average_response_time = serializers.FloatField(read_only=True)
+    fulfillment_rate = serializers.SerializerMethodField()
+
+    class Meta:
+        model = VendorProfile
+        fields = [
+            "id", "vendor_code", "business_name", "total_po_count", "completed_count",
+            "on_time_delivery_rate", "quality_rating_avg", "average_response_time",
+            "fulfillment_rate",
+        ]
+
+    def get_on_time_delivery_rate(self, obj):
+        return round(obj.on_time_delivery_rate, 2)
+
+    def get_quality_rating_avg(self, obj):
+        return round(obj.quality_rating_avg, 2)
+
+    def get_fulfillment_rate(self, obj):
+        return round(obj.fulfillment_rate, 2)
+
+
 class VendorMiniViewSerializer(serializers.ModelSerializer):
     """
     Minimal serializer for VendorProfile for reduced data representation.
@@ -304,7 +353,11 @@ class VendorFormSerializer(serializers.Serializer):
         Update method for VendorFormSerializer.
         """
         if validated_data.get("settings"):
-            _ = VendorProfile.objects.filter(id=instance.id).update(**validated_data.get("settings"))
+            _ = VendorProfile.objects.filter(id=instance.id).update(
+                **validated_data.get("settings"), updated_at=timezone.now()
+            )
+            # queryset updates send no post_save to bump the cached list counts
+            invalidate_counts(VendorProfile)
         instance.refresh_from_db()
         if validated_data.get("user"):
             for k, v in validated_data.get("user").items():
@@ -324,15 +377,42 @@ class VendorHistoricalPerformanceSerializer(serializers.ModelSerializer):
     Serializer for historical performance of vendors.
     """
 
-    vendor = VendorSerializer(read_only=True)
-    on_time_delivery_rate = serializers.FloatField(required=False)
-    quality_rating_avg = serializers.FloatField(required=False)
-    avg_response_time = serializers.FloatField(required=False)
-    fulfillment_rate = serializers.FloatField(required=False)
+    date = serializers.DateTimeField(format=DATETIME_FORMAT, read_only=True)
 
     class Meta:
-        model = VendorProfile
+        model = VendorHistoricalPerformance
+        fields = [
+            "date", "on_time_delivery_rate", "quality_rating_avg",
+            "average_response_time", "fulfillment_rate",
+        ]
+
+
+class VendorPerformanceRollupSerializer(serializers.ModelSerializer):
+    """
+    Serializer for daily, weekly and monthly vendor performance rollups.
+    """
+
+    date = serializers.DateField(source="bucket", format=DATE_FORMAT, read_only=True)
+    on_time_delivery_rate = serializers.SerializerMethodField()
+    quality_rating_avg = serializers.SerializerMethodField()
+    average_response_time = serializers.SerializerMethodField()
+    fulfillment_rate = serializers.SerializerMethodField()
+
+    class Meta:
+        model = VendorPerformanceRollup
         fields = [
-            "vendor", "on_time_delivery_rate", "quality_rating_avg", 
-            "avg_response_time", "fulfillment_rate",
+            "date", "resolution", "sample_count", "on_time_delivery_rate",
+            "quality_rating_avg", "average_response_time", "fulfillment_rate",
         ]
+
+    def get_on_time_delivery_rate(self, obj):
+        return round(obj.metrics["on_time_delivery_rate"], 2)
+
+    def get_quality_rating_avg(self, obj):
+        return round(obj.metrics["quality_rating_avg"], 2)
+
+    def get_average_response_time(self, obj):
+        return obj.metrics["average_response_time"]
+
+    def get_fulfillment_rate(self, obj):
+        return round(obj.metrics["fulfillment_rate"], 2)
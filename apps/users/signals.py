@@ -1,24 +1,193 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
 from django.dispatch import receiver
 
-from .models import  VendorHistoricalPerformance
-from django.utils import timezone
+from .cache import invalidate_vendor_metrics
+from .metrics import CONTRIBUTION_FIELDS, contribution_delta, empty_totals, purchase_order_contribution
+from .models import BuyerSettings, User, VendorMetricAccumulator, VendorMetricsQueue, VendorProfile
+from apps.utils.counting import invalidate_counts
 from django.apps import apps
 
 
 PurchaseOrder = apps.get_model("purchase_orders.PurchaseOrder")
+PurchaseOrderSearchDocument = apps.get_model("purchase_orders.PurchaseOrderSearchDocument")
+Item = apps.get_model("purchase_orders.Item")
+
+
+def contribution_values(instance):
+    """Returns the instance's metric columns as they will be stored"""
+    return {
+        field: instance._meta.get_field(field).to_python(getattr(instance, field))
+        for field in CONTRIBUTION_FIELDS
+    }
+
+
+def apply_contribution_change(old, new):
+    """
+    Moves a purchase order's contribution from `old` to `new` values,
+    either being None when the purchase order did not or no longer exists.
+    Returns the ids of the vendors whose totals changed.
+    """
+    old_vendor = old["vendor_id"] if old else None
+    new_vendor = new["vendor_id"] if new else None
+    old_contribution = purchase_order_contribution(old) if old_vendor else None
+    new_contribution = purchase_order_contribution(new) if new_vendor else None
+
+    changed = set()
+    if old_vendor == new_vendor:
+        if new_vendor and VendorMetricAccumulator.apply_delta(
+            new_vendor, contribution_delta(old_contribution, new_contribution)
+        ):
+            changed.add(new_vendor)
+        return changed
+    if old_vendor and VendorMetricAccumulator.apply_delta(
+        old_vendor, contribution_delta(old_contribution, None)
+    ):
+        changed.add(old_vendor)
+    if new_vendor and VendorMetricAccumulator.apply_delta(
+        new_vendor, contribution_delta(None, new_contribution)
+    ):
+        changed.add(new_vendor)
+    return changed
+
+
+def apply_contribution_changes(changes):
+    """
+    Applies many (old, new) contribution changes as one running totals
+    update per vendor, then invalidates and queues the vendors once.
+    Returns the ids of the vendors whose totals changed.
+    """
+    deltas = {}
+    for old, new in changes:
+        for values, sign in ((old, -1), (new, 1)):
+            if not values or not values["vendor_id"]:
+                continue
+            delta = deltas.setdefault(values["vendor_id"], empty_totals())
+            for field, value in purchase_order_contribution(values).items():
+                delta[field] += sign * value
+    changed = {
+        vendor_id for vendor_id, delta in deltas.items() if VendorMetricAccumulator.apply_delta(vendor_id, delta)
+    }
+    if changed:
+        invalidate_vendor_metrics(changed)
+        VendorMetricsQueue.mark_dirty(changed)
+    return changed
+
+
+def purchase_orders_bulk_created(purchase_orders):
+    """
+    Does for purchase orders inserted with bulk_create, which sends no
+    signals, what the post_save receivers do for each one.
+    """
+    apply_contribution_changes((None, contribution_values(instance)) for instance in purchase_orders)
+    PurchaseOrderSearchDocument.refresh(instance.pk for instance in purchase_orders)
+    invalidate_counts(PurchaseOrder)
+
+
+def purchase_orders_transitioned(previous, status):
+    """
+    Does for purchase orders moved to `status` with a queryset update, which
+    sends no signals, what the post_save receivers do for each one.
+    `previous` holds their metric columns from before the update.
+    """
+    apply_contribution_changes((row, {**row, "status": status}) for row in previous)
+    transitioned = {row["vendor_id"] for row in previous if row["vendor_id"] and row["status"] != status}
+    if transitioned:
+        VendorMetricsQueue.mark_dirty(transitioned, status_changed=True)
+    invalidate_counts(PurchaseOrder)
+
+
+@receiver(pre_save, sender=PurchaseOrder)
+def capture_previous_contribution(sender, instance, raw=False, **kwargs):
+    instance._previous_contribution = None
+    if raw or instance._state.adding:
+        return
+    instance._previous_contribution = (
+        sender.objects.filter(pk=instance.pk).values(*CONTRIBUTION_FIELDS).first()
+    )
 
 
 @receiver(post_save, sender=PurchaseOrder)
-def update_performance_metrics(sender, instance, created, **kwargs):
-    if instance.status == 'completed' and instance.vendor :
-        performance_metrics = instance.vendor.calculate_performance_metrics #calculate_performance_metrics(instance.vendor)
-        VendorHistoricalPerformance.objects.create(
-            vendor=instance.vendor,
-            date=timezone.now(),
-            on_time_delivery_rate=performance_metrics['on_time_delivery_rate'],
-            quality_rating_avg=performance_metrics['quality_rating_avg'],
-            average_response_time=(performance_metrics['average_response_time']),
-            fulfillment_rate=performance_metrics['fulfillment_rate']
+def update_performance_metrics(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, "_previous_contribution", None)
+    changed = apply_contribution_change(previous, contribution_values(instance))
+    if changed:
+        invalidate_vendor_metrics(changed)
+        VendorMetricsQueue.mark_dirty(changed)
+    # a status transition is snapshotted even when it leaves the metrics untouched
+    if previous and previous["status"] != instance.status and instance.vendor_id:
+        VendorMetricsQueue.mark_dirty([instance.vendor_id], status_changed=True)
+
+
+@receiver(post_delete, sender=PurchaseOrder)
+def remove_purchase_order_contribution(sender, instance, **kwargs):
+    changed = apply_contribution_change(contribution_values(instance), None)
+    if changed:
+        invalidate_vendor_metrics(changed)
+        VendorMetricsQueue.mark_dirty(changed)
+
+
+@receiver(post_save, sender=PurchaseOrder)
+@receiver(post_delete, sender=PurchaseOrder)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=VendorProfile)
+@receiver(post_delete, sender=VendorProfile)
+@receiver(post_save, sender=BuyerSettings)
+@receiver(post_delete, sender=BuyerSettings)
+def invalidate_list_counts(sender, **kwargs):
+    # updates count too, they move rows in and out of filtered lists
+    invalidate_counts(sender)
+
+
+@receiver(post_save, sender=PurchaseOrder)
+def index_purchase_order(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    PurchaseOrderSearchDocument.refresh([instance.pk])
+
+
+@receiver(m2m_changed, sender=PurchaseOrder.items.through)
+def index_purchase_order_items(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == "pre_clear":
+        instance._cleared_purchase_order_ids = list(
+            sender.objects.filter(item_id=instance.pk).values_list("purchaseorder_id", flat=True)
         )
-       
\ No newline at end of file
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        PurchaseOrderSearchDocument.refresh([instance.pk])
+    elif action == "post_clear":
+        PurchaseOrderSearchDocument.refresh(getattr(instance, "_cleared_purchase_order_ids", []))
+    else:
+        PurchaseOrderSearchDocument.refresh(pk_set)
+
+
+@receiver(post_save, sender=Item)
+def index_item_purchase_orders(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    PurchaseOrderSearchDocument.refresh(
+        PurchaseOrder.items.through.objects.filter(item_id=instance.pk).values_list("purchaseorder_id", flat=True)
+    )
+
+
+@receiver(pre_save, sender=VendorProfile)
+def capture_previous_vendor_names(sender, instance, raw=False, **kwargs):
+    instance._previous_names = None
+    if raw or instance._state.adding:
+        return
+    instance._previous_names = (
+        sender.objects.filter(pk=instance.pk).values_list("business_name", "vendor_code").first()
+    )
+
+
+@receiver(post_save, sender=VendorProfile)
+def index_vendor_purchase_orders(sender, instance, created, raw=False, **kwargs):
+    previous = getattr(instance, "_previous_names", None)
+    if raw or previous is None or previous == (instance.business_name, instance.vendor_code):
+        return
+    PurchaseOrderSearchDocument.refresh(
+        PurchaseOrder.objects.filter(vendor_id=instance.pk).values_list("id", flat=True)
+    )
@@ -1,10 +1,12 @@
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 import pytz
 
 from django.contrib.auth import authenticate, get_user_model, logout
 from django.db.models import Q
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect
+from django.utils import timezone
 from django.utils.decorators import method_decorator
 from django.utils.timezone import make_aware
 from drf_yasg import openapi
@@ -18,7 +20,15 @@ from rest_framework_simplejwt.tokens import RefreshToken
 
 from apps.purchase_orders.models import PurchaseOrder
 from apps.purchase_orders.serializer import PurchaseOrderSerializer
-from apps.users.models import BuyerSettings, VendorProfile
+from apps.users.cache import get_vendor_metrics
+from apps.users.metrics import METRIC_FIELDS
+from apps.users.models import (
+    BuyerSettings,
+    VendorHistoricalPerformance,
+    VendorMetricCheckpoint,
+    VendorPerformanceRollup,
+    VendorProfile,
+)
 from apps.users.serializer import (
     BuyerFormSerializer,
     BuyerRegistrationSerializer,
@@ -26,17 +36,24 @@ from apps.users.serializer import (
     UserSerializer,
     VendorFormSerializer,
     VendorHistoricalPerformanceSerializer,
+    VendorPerformanceRollupSerializer,
+    VendorPerformanceSerializer,
     VendorRegistrationSerializer,
     VendorSerializer,
 )
 from apps.utils.base import Addon, BaseViewSet
-from apps.utils.enums import UserGroup
+from apps.utils.conditional import conditional_validators, not_modified_response, set_validators
+from apps.utils.constant import DATETIME_FORMAT
+from apps.utils.enums import PerformanceResolutionEnum, UserGroup
 from apps.utils.permissions import buyer_access_only, vendor_access_only
 
 logger = logging.getLogger("users")
 
 User = get_user_model()
 
+PERFORMANCE_ORDERING_FIELDS = METRIC_FIELDS + ("total_po_count",)
+DEFAULT_HISTORY_DAYS = 30
+
 
 def get_tokens_for_user(user):
     refresh = RefreshToken.for_user(user)
@@ -251,6 +268,8 @@ class UserViewSet(BaseViewSet):
                 queryset=self.get_list(self.get_queryset()),
                 serializer_class=self.serializer_class,
             )
+            if isinstance(paginate, StreamingHttpResponse):
+                return paginate
             context.update(
                 {"status": status.HTTP_200_OK, "data": paginate}
             )
@@ -308,6 +327,8 @@ class VendorViewSet(BaseViewSet):
                 queryset=self.get_list(self.get_queryset()),
                 serializer_class=self.serializer_class,
             )
+            if isinstance(paginate, StreamingHttpResponse):
+                return paginate
             context.update(
                 {"status": status.HTTP_200_OK, "data": paginate}
             )
@@ -336,6 +357,8 @@ class VendorViewSet(BaseViewSet):
                 queryset=self.get_list(queryset),
                 serializer_class=UserSerializer,
             )
+            if isinstance(paginate, StreamingHttpResponse):
+                return paginate
             context.update(
                 {"status": status.HTTP_200_OK, "data": paginate}
             )
@@ -354,14 +377,22 @@ class VendorViewSet(BaseViewSet):
     @method_decorator(vendor_access_only(), name="dispatch")
     def me(self, request, *args, **kwargs):
         context = {"status": status.HTTP_200_OK}
+        validators = None
         try:
-            vendor = self.queryset.filter(user__id=request.user.id)
+            # the performance metrics only change along with the running totals
+            validators = conditional_validators(
+                request,
+                VendorProfile.objects.filter(user__id=request.user.id),
+                ("updated_at", "user__updated_at", "metric_accumulator__updated_at"),
+            )
+            not_modified = not_modified_response(request, validators)
+            if not_modified is not None:
+                return not_modified
+            vendor = self.queryset.filter(user__id=request.user.id).first()
 
-            if vendor.exists():
-                
-                performance_metrics = vendor.first().calculate_performance_metrics
-                
-                performance_metrics.update(vendor=VendorSerializer(vendor.first()).data)
+            if vendor is not None:
+                performance_metrics = dict(get_vendor_metrics(vendor))
+                performance_metrics.update(vendor=VendorSerializer(vendor).data)
                 context.update(
                     {
                         "data": performance_metrics
@@ -373,7 +404,7 @@ class VendorViewSet(BaseViewSet):
             context.update(
                 {"status": status.HTTP_400_BAD_REQUEST, "message": str(ex)}
             )
-        return Response(context, status=context["status"])
+        return set_validators(Response(context, status=context["status"]), validators)
 
     @swagger_auto_schema(
         request_body=VendorFormSerializer,
@@ -428,11 +459,18 @@ class VendorViewSet(BaseViewSet):
     )
     def retrieve(self, requests, *args, **kwargs):
         context = {"status": status.HTTP_200_OK}
+        validators = None
         try:
+            validators = conditional_validators(
+                requests, VendorProfile.objects.filter(pk=self.kwargs.get("pk")), ("updated_at", "user__updated_at")
+            )
+            not_modified = not_modified_response(requests, validators)
+            if not_modified is not None:
+                return not_modified
             context.update({"data": self.serializer_class(self.get_object()).data})
         except Exception as ex:
             context.update({"status": status.HTTP_400_BAD_REQUEST, "message": str(ex)})
-        return Response(context, status=context["status"])
+        return set_validators(Response(context, status=context["status"]), validators)
 
     @action(
         detail=False,
@@ -449,11 +487,74 @@ class VendorViewSet(BaseViewSet):
     def vendor_po_list(self, request, *args, **kwargs):
         context = {"status": status.HTTP_200_OK}
         try:
-            queryset = PurchaseOrder.objects.filter(vendor__user=request.user)
+            queryset = PurchaseOrder.objects.filter(vendor__user=request.user).with_serializer_relations(
+                PurchaseOrderSerializer(context={"request": request})
+            )
             paginate = self.get_paginated_data(
                 queryset=self.get_list(queryset),
                 serializer_class=PurchaseOrderSerializer,
             )
+            if isinstance(paginate, StreamingHttpResponse):
+                return paginate
+            context.update(
+                {"status": status.HTTP_200_OK, "data": paginate}
+            )
+        except Exception as ex:
+            context.update(
+                {"status": status.HTTP_400_BAD_REQUEST, "message": str(ex)}
+            )
+        return Response(context, status=context["status"])
+
+    @swagger_auto_schema(
+        operation_description="Ranks vendors by their performance metrics",
+        responses={},
+        operation_summary="Vendor performance leaderboard",
+        manual_parameters=[
+            openapi.Parameter(
+                "ordering",
+                openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                required=False,
+                description="Metric to rank by, prefix with '-' for descending order",
+                enum=[f"{prefix}{field}" for field in PERFORMANCE_ORDERING_FIELDS for prefix in ("-", "")],
+            ),
+            openapi.Parameter(
+                "min_pos",
+                openapi.IN_QUERY,
+                type=openapi.TYPE_INTEGER,
+                required=False,
+                description="Only rank vendors with at least this many purchase orders",
+            ),
+        ],
+    )
+    @action(
+        detail=False,
+        methods=["get"],
+        description="Get vendors ranked by performance.",
+        url_path="performance",
+        url_name="performance-leaderboard",
+    )
+    def performance_leaderboard(self, request, *args, **kwargs):
+        context = {"status": status.HTTP_200_OK}
+        try:
+            ordering = request.GET.get("ordering", "-on_time_delivery_rate")
+            if ordering.lstrip("-") not in PERFORMANCE_ORDERING_FIELDS:
+                raise Exception(
+                    f"Kindly supply a valid ordering, one of {', '.join(PERFORMANCE_ORDERING_FIELDS)}"
+                )
+            min_pos = int(request.GET.get("min_pos", 0))
+
+            queryset = VendorProfile.objects.with_performance_metrics()
+            if min_pos > 0:
+                queryset = queryset.filter(total_po_count__gte=min_pos)
+            queryset = queryset.order_by(ordering, "id")
+
+            paginate = self.get_paginated_data(
+                queryset=queryset,
+                serializer_class=VendorPerformanceSerializer,
+            )
+            if isinstance(paginate, StreamingHttpResponse):
+                return paginate
             context.update(
                 {"status": status.HTTP_200_OK, "data": paginate}
             )
@@ -473,12 +574,34 @@ class VendorViewSet(BaseViewSet):
         operation_description="",
         responses={},
         operation_summary="Get vendor performance",
+        manual_parameters=[
+            openapi.Parameter(
+                "as_of",
+                openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                required=False,
+                description="ISO 8601 date or datetime to get the metrics as they stood at",
+            ),
+        ],
     )
     def performance(self, request, *args, **kwargs):
         context = {"status": status.HTTP_200_OK}
         try:
             vendor = self.get_object()
-            performance_metrics = vendor.calculate_performance_metrics
+            as_of = self.parse_date_param(request.GET.get("as_of"), end_of_day=True)
+            if as_of is None:
+                performance_metrics = dict(get_vendor_metrics(vendor))
+            else:
+                performance_metrics = VendorMetricCheckpoint.metrics_as_of(vendor.id, as_of)
+                if performance_metrics is None:
+                    context.update(
+                        {
+                            "status": status.HTTP_404_NOT_FOUND,
+                            "message": "No performance metrics were recorded for this vendor by as_of",
+                        }
+                    )
+                    return Response(context, status=context["status"])
+                performance_metrics.update(as_of=timezone.localtime(as_of).strftime(DATETIME_FORMAT))
             performance_metrics.update(vendor=VendorSerializer(vendor).data)
             context.update(
                 {
@@ -500,20 +623,73 @@ class VendorViewSet(BaseViewSet):
         url_path="performance/history"
     )
     @swagger_auto_schema(
-        operation_description="",
+        operation_description=(
+            "Raw snapshots default to the last "
+            f"{DEFAULT_HISTORY_DAYS} days, rollups are unbounded unless a range is given."
+        ),
         responses={},
         operation_summary="Get vendor performance history",
+        manual_parameters=[
+            openapi.Parameter(
+                "from",
+                openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                required=False,
+                description="ISO 8601 date or datetime the history starts from (inclusive)",
+            ),
+            openapi.Parameter(
+                "to",
+                openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                required=False,
+                description="ISO 8601 date or datetime the history ends at (inclusive)",
+            ),
+            openapi.Parameter(
+                "resolution",
+                openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                required=False,
+                description="Raw snapshots or daily, weekly and monthly averages",
+                enum=PerformanceResolutionEnum.to_list(),
+            ),
+        ],
     )
-    def performance(self, request, *args, **kwargs):
+    def performance_history(self, request, *args, **kwargs):
         context = {"status": status.HTTP_200_OK}
         try:
             vendor = self.get_object()
-            performance_history = vendor.vendor_profile.select_related('vendor').all()
-
+            resolution = request.GET.get("resolution", PerformanceResolutionEnum.RAW)
+            if resolution not in PerformanceResolutionEnum.to_list():
+                raise Exception(
+                    f"Kindly supply a valid resolution, one of {', '.join(PerformanceResolutionEnum.to_list())}"
+                )
+            date_from = self.parse_date_param(request.GET.get("from"))
+            date_to = self.parse_date_param(request.GET.get("to"), end_of_day=True)
+
+            if resolution == PerformanceResolutionEnum.RAW:
+                if date_from is None and date_to is None:
+                    date_from = timezone.now() - timedelta(days=DEFAULT_HISTORY_DAYS)
+                history = VendorHistoricalPerformance.objects.filter(vendor=vendor)
+                if date_from is not None:
+                    history = history.filter(date__gte=date_from)
+                if date_to is not None:
+                    history = history.filter(date__lte=date_to)
+                data = VendorHistoricalPerformanceSerializer(history.order_by("date"), many=True).data
+            else:
+                history = VendorPerformanceRollup.objects.filter(vendor=vendor, resolution=resolution)
+                if date_from is not None:
+                    history = history.filter(
+                        bucket__gte=VendorPerformanceRollup.bucket_start(
+                            resolution, timezone.localtime(date_from).date()
+                        )
+                    )
+                if date_to is not None:
+                    history = history.filter(bucket__lte=timezone.localtime(date_to).date())
+                data = VendorPerformanceRollupSerializer(history.order_by("bucket"), many=True).data
 
             context.update(
                 {
-                    "data": VendorHistoricalPerformanceSerializer(performance_history, many=True).data
+                    "data": data
                 }
             )   
            
@@ -547,6 +723,8 @@ class BuyerSettingsViewSet(BaseViewSet):
                 queryset=self.get_list(self.get_queryset()),
                 serializer_class=self.serializer_class,
             )
+            if isinstance(paginate, StreamingHttpResponse):
+                return paginate
             context.update(
                 {"status": status.HTTP_200_OK, "data": paginate}
             )
@@ -575,6 +753,8 @@ class BuyerSettingsViewSet(BaseViewSet):
                 queryset=self.get_list(queryset),
                 serializer_class=VendorSerializer,
             )
+            if isinstance(paginate, StreamingHttpResponse):
+                return paginate
             context.update(
                 {"status": status.HTTP_200_OK, "data": paginate}
             )
@@ -593,14 +773,21 @@ class BuyerSettingsViewSet(BaseViewSet):
     @method_decorator(buyer_access_only(), name="dispatch")
     def account(self, request, *args, **kwargs):
         context = {"status": status.HTTP_200_OK}
+        validators = None
         try:
+            validators = conditional_validators(
+                request, BuyerSettings.objects.filter(user=request.user), ("updated_at", "user__updated_at")
+            )
+            not_modified = not_modified_response(request, validators)
+            if not_modified is not None:
+                return not_modified
             instance, _ = self.queryset.get_or_create(user=request.user)
             context.update({"data": self.serializer_class(instance).data})
         except Exception as ex:
             context.update(
                 {"status": status.HTTP_400_BAD_REQUEST, "message": str(ex)}
             )
-        return Response(context, status=context["status"])
+        return set_validators(Response(context, status=context["status"]), validators)
 
     @swagger_auto_schema(
         request_body=BuyerFormSerializer,
@@ -664,11 +851,15 @@ class BuyerSettingsViewSet(BaseViewSet):
     def buyer_po_list(self, request, *args, **kwargs):
         context = {"status": status.HTTP_200_OK}
         try:
-            queryset = PurchaseOrder.objects.filter(buyer=request.user)
+            queryset = PurchaseOrder.objects.filter(buyer=request.user).with_serializer_relations(
+                PurchaseOrderSerializer(context={"request": request})
+            )
             paginate = self.get_paginated_data(
                 queryset=self.get_list(queryset),
                 serializer_class=PurchaseOrderSerializer,
             )
+            if isinstance(paginate, StreamingHttpResponse):
+                return paginate
             context.update(
                 {"status": status.HTTP_200_OK, "data": paginate}
             )
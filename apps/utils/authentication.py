@@ -1,6 +1,75 @@
-from django.db.models import Q
+from django.db.models import Exists, OuterRef, Q, Subquery
+from rest_framework_simplejwt.authentication import JWTAuthentication
 
 from apps.users.models import User
+from apps.utils.enums import UserGroup
+
+
+def principal_queryset():
+    """
+    Users with everything a request needs to know about its caller, their
+    role, group memberships, vendor profile and buyer settings, in one query.
+    """
+    memberships = User.groups.through.objects.filter(user_id=OuterRef("pk"))
+    return User.objects.select_related("vendor", "buyer").annotate(
+        role=Subquery(memberships.order_by("group_id").values("group__name")[:1]),
+        is_vendor=Exists(memberships.filter(group__name=UserGroup.VENDOR)),
+        is_buyer=Exists(memberships.filter(group__name=UserGroup.BUYER)),
+    )
+
+
+class Principal(object):
+    """
+    The caller of a request, resolved once and attached to the request.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self.role = user.role or "buyer"
+        self.is_vendor = user.is_vendor
+        self.is_buyer = user.is_buyer
+        self.vendor = getattr(user, "vendor", None)
+        self.buyer = getattr(user, "buyer", None)
+
+
+def get_principal(request):
+    """
+    Returns the principal of the request, loading it on first use when the
+    user was not authenticated through principal_queryset.
+    """
+    principal = getattr(request, "_principal", None)
+    if principal is None:
+        user = request.user
+        if user is None or not user.is_authenticated:
+            return None
+        if not hasattr(user, "role"):
+            user = principal_queryset().get(pk=user.pk)
+        principal = request._principal = Principal(user)
+    return principal
+
+
+class PrincipalUsers(object):
+    """
+    Stands in for the user model in simplejwt's user lookup, so users are
+    read through principal_queryset.
+    """
+
+    DoesNotExist = User.DoesNotExist
+
+    @property
+    def objects(self):
+        return principal_queryset()
+
+
+class PrincipalJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication loading the user through principal_queryset. Token
+    validation and the user checks are simplejwt's own.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user_model = PrincipalUsers()
 
 
 class CustomAuthBackend(object):
@@ -22,6 +91,6 @@ class CustomAuthBackend(object):
 
     def get_user(self, user_id):
         try:
-            return User.objects.get(pk=user_id)
+            return principal_queryset().get(pk=user_id)
         except User.DoesNotExist:
             return None
@@ -1,8 +1,11 @@
 import logging
 import uuid
 from abc import ABC, abstractmethod
+from datetime import datetime, time
 
-from django.utils.crypto import get_random_string
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
@@ -11,11 +14,12 @@ from rest_framework.filters import OrderingFilter, SearchFilter
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet, ViewSet
-from rest_framework_simplejwt.authentication import JWTAuthentication
 
 from apps.users.models import BuyerSettings, User
 from apps.users.serializer import VendorProfile
-from apps.utils.pagination import CustomPaginator
+from apps.utils.authentication import PrincipalJWTAuthentication, get_principal
+from apps.utils.identifiers import ALPHANUMERIC, DIGITS, allocate_identifiers
+from apps.utils.pagination import CustomPaginator, default_ordering
 
 logger = logging.getLogger("base")
 
@@ -31,42 +35,34 @@ class Addon:
         return False
 
     def generate_uuid(self, model, column):
-        unique = str(uuid.uuid4())
-        kwargs = {column: unique}
-        qs_exists = model.objects.filter(**kwargs).exists()
-        if qs_exists:
-            return self.generate_uuid(model, column)
-        return unique
+        # uuid4 values do not repeat in practice, the unique constraint guards the rest
+        return str(uuid.uuid4())
 
     def unique_number_generator(
-        self, model, field, length=6, allowed_chars="0123456789"
+        self, model, field, length=6, allowed_chars=DIGITS
     ):
-        unique = get_random_string(
-            length=length, allowed_chars=allowed_chars
-        )
-        kwargs = {field: unique}
-        qs_exists = model.objects.filter(**kwargs).exists()
-        if qs_exists:
-            return self.unique_number_generator(model, field, length)
-        return unique
+        return allocate_identifiers(model, field, 1, length, allowed_chars)[0]
+
+    def unique_numbers_generator(
+        self, model, field, count, length=6, allowed_chars=DIGITS
+    ):
+        """
+        `count` distinct values for `field`, allocated together without
+        querying the table.
+        """
+        return allocate_identifiers(model, field, count, length, allowed_chars)
 
     def unique_alpha_numeric_generator(
         self,
         model,
         field,
         length=6,
-        allowed_chars="ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789",
+        allowed_chars=ALPHANUMERIC,
         prefix=None,
     ):
-        unique = get_random_string(
-            length=length, allowed_chars=allowed_chars
-        )
+        unique = allocate_identifiers(model, field, 1, length, allowed_chars)[0]
         if prefix:
             unique = f"{prefix}_{unique}"
-        kwargs = {field: unique}
-        qs_exists = model.objects.filter(**kwargs).exists()
-        if qs_exists:
-            return self.unique_alpha_numeric_generator(model, field)
         return unique
 
 class CustomFilter(DjangoFilterBackend):
@@ -96,13 +92,9 @@ class AbstractBaseViewSet:
             return BuyerSettings.objects.filter(
             id=request.GET.get("buy_id")
             ).first()
-        
-        if request.user.id: 
-            return BuyerSettings.objects.filter(
-                user__id=request.user.id
-            ).first()
-        
-        return None
+
+        principal = get_principal(request)
+        return principal.buyer if principal is not None else None
 
     @staticmethod
     def get_vendor(request):
@@ -110,14 +102,9 @@ class AbstractBaseViewSet:
             return VendorProfile.objects.filter(
                 id=request.GET.get("vendor_id")
             ).first()
-        
-        elif request.user.id: 
-            return VendorProfile.objects.filter(
-                user__id=request.user.id
-            ).first()
-        
-        return None
-        
+
+        principal = get_principal(request)
+        return principal.vendor if principal is not None else None
 
     @staticmethod
     def error_message_formatter(serializer_errors):
@@ -128,13 +115,24 @@ class AbstractBaseViewSet:
         }
 
     @staticmethod
-    def order_date_filtering(date_from, date_to, queryset):
-        if date_from and date_to:
-            try:
-                queryset = queryset.filter(order_date__range=[float(date_from), float(date_to)])
-            except Exception as ex:
-                logger.error(f"error filtering date due to {str(ex)}")
-        return queryset
+    def parse_date_param(value, end_of_day=False):
+        """
+        Parses an ISO 8601 date or datetime query parameter into an aware
+        datetime. Plain dates resolve to the start of the day, or its last
+        instant when `end_of_day` is set.
+        """
+        if not value:
+            return None
+        day = parse_date(value)
+        if day is not None:
+            parsed = datetime.combine(day, time.max if end_of_day else time.min)
+        else:
+            parsed = parse_datetime(value)
+            if parsed is None:
+                raise Exception(f"{value} is not a valid ISO 8601 date")
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
 
     @staticmethod
     def user_obj_permission(request, obj):
@@ -160,7 +158,7 @@ class AbstractBaseViewSet:
       
         
 class BaseViewSet(ViewSet, AbstractBaseViewSet, Addon):
-    authentication_classes = [SessionAuthentication, JWTAuthentication]
+    authentication_classes = [SessionAuthentication, PrincipalJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     @staticmethod
@@ -176,33 +174,33 @@ class BaseViewSet(ViewSet, AbstractBaseViewSet, Addon):
         if isinstance(queryset, set):
             return list(queryset)
         
+        query_set = queryset
+        if self.request.query_params:
+            query_set = self.custom_filter_class.filter_queryset(
+                request=self.request, queryset=query_set, view=self
+            )
+        if "ordering" not in self.request.query_params:
+            query_set = query_set.order_by(*default_ordering(query_set.model))
         if "search" in self.request.query_params:
             query_set = self.search_backends.filter_queryset(
-                request=self.request, queryset=queryset, view=self
+                request=self.request, queryset=query_set, view=self
             )
-        elif self.request.query_params:
-            query_set = self.custom_filter_class.filter_queryset(
-                request=self.request, queryset=queryset, view=self
-            )
-        else:
-            query_set = queryset
-        if "ordering" in self.request.query_params:
+        if "ordering" in self.request.query_params and getattr(self, "filterset_class", None) is None:
+            # a filterset orders by its own whitelisted ordering filter
             query_set = self.order_backend.filter_queryset(
-                request=self.request, queryset=queryset, view=self
+                request=self.request, queryset=query_set, view=self
             )
-        else:
-            query_set = query_set.order_by("-pk")  # was originally 'pk'
         return query_set
 
-    def get_paginated_data(self, queryset, serializer_class):
+    def get_paginated_data(self, queryset, serializer_class, count=None):
         paginated_data = self.paginator_class.generate_response(
-            queryset, serializer_class, self.request
+            queryset, serializer_class, self.request, view=self, count=count
         )
         return paginated_data
 
 
 class BaseModelViewSet(ModelViewSet, AbstractBaseViewSet, Addon):
-    authentication_classes = [SessionAuthentication, JWTAuthentication]
+    authentication_classes = [SessionAuthentication, PrincipalJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     @staticmethod
@@ -214,27 +212,27 @@ class BaseModelViewSet(ModelViewSet, AbstractBaseViewSet, Addon):
         )
 
     def get_list(self, queryset):
+        query_set = queryset
+        if self.request.query_params:
+            query_set = self.custom_filter_class.filter_queryset(
+                request=self.request, queryset=query_set, view=self
+            )
+        if "ordering" not in self.request.query_params:
+            query_set = query_set.order_by(*default_ordering(query_set.model))
         if "search" in self.request.query_params:
             query_set = self.search_backends.filter_queryset(
-                request=self.request, queryset=queryset, view=self
-            )
-        elif self.request.query_params:
-            query_set = self.custom_filter_class.filter_queryset(
-                request=self.request, queryset=queryset, view=self
+                request=self.request, queryset=query_set, view=self
             )
-        else:
-            query_set = queryset
-        if "ordering" in self.request.query_params:
+        if "ordering" in self.request.query_params and getattr(self, "filterset_class", None) is None:
+            # a filterset orders by its own whitelisted ordering filter
             query_set = self.order_backend.filter_queryset(
-                request=self.request, queryset=queryset, view=self
+                request=self.request, queryset=query_set, view=self
             )
-        else:
-            query_set = query_set.order_by("-pk")  # was originally 'pk'
         return query_set
 
-    def get_paginated_data(self, queryset, serializer_class):
+    def get_paginated_data(self, queryset, serializer_class, count=None):
         paginated_data = self.paginator_class.generate_response(
-            queryset, serializer_class, self.request
+            queryset, serializer_class, self.request, view=self, count=count
         )
         return paginated_data
 
@@ -275,27 +273,27 @@ class BaseNoAuthViewSet(ViewSet, Addon):
         pass
 
     def get_list(self, queryset):
+        query_set = queryset
+        if self.request.query_params:
+            query_set = self.custom_filter_class.filter_queryset(
+                request=self.request, queryset=query_set, view=self
+            )
+        if "ordering" not in self.request.query_params:
+            query_set = query_set.order_by(*default_ordering(query_set.model))
         if "search" in self.request.query_params:
             query_set = self.search_backends.filter_queryset(
-                request=self.request, queryset=queryset, view=self
+                request=self.request, queryset=query_set, view=self
             )
-        elif self.request.query_params:
-            query_set = self.custom_filter_class.filter_queryset(
-                request=self.request, queryset=queryset, view=self
-            )
-        else:
-            query_set = queryset
-        if "ordering" in self.request.query_params:
+        if "ordering" in self.request.query_params and getattr(self, "filterset_class", None) is None:
+            # a filterset orders by its own whitelisted ordering filter
             query_set = self.order_backend.filter_queryset(
-                query_set, self.request, self
+                request=self.request, queryset=query_set, view=self
             )
-        else:
-            query_set = query_set.order_by("-pk")
         return query_set
 
     def paginator(self, queryset, serializer_class):
         paginated_data = self.paginator_class.generate_response(
-            queryset, serializer_class, self.request
+            queryset, serializer_class, self.request, view=self
         )
         return paginated_data
 
@@ -310,6 +308,8 @@ class BaseNoAuthViewSet(ViewSet, Addon):
                 queryset=self.get_list(self.get_queryset()),
                 serializer_class=self.serializer_class,
             )
+            if isinstance(paginate, StreamingHttpResponse):
+                return paginate
             context.update(
                 {
                     "status": status.HTTP_200_OK,
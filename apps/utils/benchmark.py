@@ -0,0 +1,63 @@
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.utils.enums import POStatusEnum
+
+SEED_BATCH_SIZE = 10000
+
+
+class Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rolled_back():
+    """
+    Runs the block in a transaction that is always rolled back, so synthetic
+    benchmark data never outlives the benchmark.
+    """
+    try:
+        with transaction.atomic():
+            yield
+            raise Rollback
+    except Rollback:
+        pass
+
+
+def seed_purchase_orders(rows, vendor_ids, buyer_ids=(None,), batch_size=SEED_BATCH_SIZE):
+    """
+    Inserts `rows` random purchase orders spread over the vendors and buyers,
+    bypassing the model signals.
+    """
+    PurchaseOrder = apps.get_model("purchase_orders.PurchaseOrder")
+    prefix = "BM"
+    now = timezone.now()
+    batch = []
+    for number in range(rows):
+        batch.append(
+            PurchaseOrder(
+                vendor_id=random.choice(vendor_ids),
+                buyer_id=random.choice(buyer_ids),
+                po_number=f"{prefix}{number:014d}",
+                delivery_date=now - timedelta(days=random.randint(0, 365)),
+                status=random.choice(POStatusEnum.to_list()),
+                quality_rating=round(random.uniform(0, 5), 1),
+                issue_date=now - timedelta(days=random.randint(0, 5)),
+                acknowledgment_date=now if random.random() < 0.7 else None,
+            )
+        )
+        if len(batch) == batch_size:
+            PurchaseOrder.objects.bulk_create(batch)
+            batch = []
+    PurchaseOrder.objects.bulk_create(batch)
+    # order_date is auto_now, spread it out afterwards so orderings are realistic
+    PurchaseOrder.objects.filter(po_number__startswith=prefix).update(
+        order_date=F("delivery_date") - timedelta(days=5)
+    )
+
@@ -0,0 +1,75 @@
+import hashlib
+from collections import namedtuple
+from datetime import datetime
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+Validators = namedtuple("Validators", ["etag", "last_modified"])
+
+
+def conditional_validators(request, queryset, fields=("updated_at",), count=None):
+    """
+    ETag and Last-Modified of the representation of `queryset` the request
+    asks for, from the row count and the latest of `fields`, in one query.
+    A `count` already known, such as a cached list total, is not recounted.
+    """
+    latest = {f"latest_{number}": Max(field) for number, field in enumerate(fields)}
+    if count is None:
+        latest["count"] = Count("pk")
+    totals = queryset.order_by().aggregate(**latest)
+    count = totals.pop("count", count)
+    user = getattr(request, "user", None)
+    return build_validators([request.get_full_path(), str(getattr(user, "pk", "")), str(count)], totals)
+
+
+def resource_validators(pk, queryset, fields=("updated_at",)):
+    """
+    ETag and Last-Modified of the resource `pk` from the latest of `fields`
+    over `queryset`. They follow the resource's state alone, not the path
+    or user, so the ETag of any GET of it can guard a write with If-Match.
+    """
+    totals = queryset.order_by().aggregate(
+        **{f"latest_{number}": Max(field) for number, field in enumerate(fields)}
+    )
+    return build_validators([str(pk)], totals)
+
+
+def build_validators(scope, totals):
+    last_modified = max(
+        (value for value in totals.values() if isinstance(value, datetime)), default=None
+    )
+    key = "|".join(scope + [str(value) for value in totals.values()])
+    return Validators(
+        quote_etag(hashlib.md5(key.encode()).hexdigest()),
+        int(last_modified.timestamp()) if last_modified else None,
+    )
+
+
+def not_modified_response(request, validators):
+    """
+    The 304 response to return when the client's copy is still current
+    according to If-None-Match or If-Modified-Since, else None.
+    """
+    if validators is None:
+        return None
+    response = get_conditional_response(request, etag=validators.etag, last_modified=validators.last_modified)
+    return None if response is None else set_validators(response, validators)
+
+
+def precondition_failed(request, validators):
+    """
+    Whether the request's If-Match or If-Unmodified-Since rules out changing
+    the resource, its current representation having other validators.
+    """
+    response = get_conditional_response(request, etag=validators.etag, last_modified=validators.last_modified)
+    return response is not None and response.status_code == 412
+
+
+def set_validators(response, validators):
+    if validators is not None and response.status_code in (200, 304):
+        response.headers["ETag"] = validators.etag
+        if validators.last_modified is not None:
+            response.headers["Last-Modified"] = http_date(validators.last_modified)
+    return response
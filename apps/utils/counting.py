@@ -0,0 +1,87 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+
+from apps.utils.enums import CountStrategyEnum
+
+COUNT_KEY = "list-count:{}:{}:{}"
+COUNT_VERSION_KEY = "list-count-version:{}"
+# Query parameters that page through or reshape a list without changing its total
+PAGING_PARAMS = ("page", "limit", "page_size", "cursor", "fields", "expand")
+
+
+def count_queryset(query_set, strategy=None, request=None, view=None):
+    """
+    Total of a list queryset according to the count strategy, exact unless
+    configured otherwise. Strategies that cannot answer fall back to exact.
+    """
+    strategy = strategy or settings.LIST_COUNT_STRATEGY
+    if strategy == CountStrategyEnum.CACHED and request is not None:
+        return cached_count(query_set, request, view)
+    if strategy == CountStrategyEnum.ESTIMATED:
+        total = estimated_count(query_set)
+        if total is not None:
+            return total
+    return query_set.count()
+
+
+def cached_count(query_set, request, view=None):
+    """
+    Exact total cached per view, filter parameters and caller for a short
+    time. Writes to the counted model bump its version, orphaning the keys.
+    """
+    label = query_set.model._meta.label
+    params = sorted((name, request.GET.getlist(name)) for name in request.GET if name not in PAGING_PARAMS)
+    scope = [
+        f"{type(view).__module__}.{type(view).__name__}" if view is not None else None,
+        getattr(view, "action", None),
+        params,
+        str(request.user.pk),
+    ]
+    digest = hashlib.md5(json.dumps(scope).encode()).hexdigest()
+    key = COUNT_KEY.format(label, cache.get(COUNT_VERSION_KEY.format(label), 0), digest)
+
+    total = cache.get(key)
+    if total is None:
+        total = query_set.count()
+        cache.set(key, total, timeout=settings.LIST_COUNT_CACHE_TIMEOUT)
+    return total
+
+
+def estimated_count(query_set):
+    """
+    The planner's row estimate for unfiltered PostgreSQL tables, None when
+    it cannot stand in for the exact total.
+    """
+    connection = connections[query_set.db]
+    if connection.vendor != "postgresql" or query_set.query.has_filters() or query_set.query.is_sliced:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [query_set.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    # tables never analyzed report -1
+    return row[0] if row and row[0] >= 0 else None
+
+
+def invalidate_counts(model):
+    """
+    Orphans the cached totals of the model's lists, again once the current
+    transaction commits so a count racing the commit is not kept.
+    """
+    key = COUNT_VERSION_KEY.format(model._meta.label)
+
+    def bump():
+        if not cache.add(key, 1, timeout=None):
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, 1, timeout=None)
+
+    bump()
+    transaction.on_commit(bump)
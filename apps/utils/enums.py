@@ -155,3 +155,51 @@ class POStatusEnum(CustomEnum):
             (cls.PENDING, "Pending"),
             (cls.CANCELLED, "Cancelled"),
             )
+
+    @classmethod
+    def transitions(cls):
+        """Maps each status to the statuses a purchase order can move to it from"""
+        return {
+            cls.COMPLETED: (cls.PENDING,),
+            cls.CANCELLED: (cls.PENDING,),
+            cls.PENDING: (cls.CANCELLED,),
+        }
+
+    @classmethod
+    def transition_origins(cls, status):
+        return cls.transitions().get(status, ())
+
+
+class PerformanceResolutionEnum(CustomEnum):
+    RAW = "raw"
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+
+    @classmethod
+    def choices(cls):
+        return (
+            (cls.RAW, "Raw"),
+            (cls.DAY, "Day"),
+            (cls.WEEK, "Week"),
+            (cls.MONTH, "Month"),
+            )
+
+    @classmethod
+    def rollups(cls):
+        return (cls.DAY, cls.WEEK, cls.MONTH)
+
+
+
+class CountStrategyEnum(CustomEnum):
+    EXACT = "exact"
+    CACHED = "cached"
+    ESTIMATED = "estimated"
+
+    @classmethod
+    def choices(cls):
+        return (
+            (cls.EXACT, "Exact"),
+            (cls.CACHED, "Cached"),
+            (cls.ESTIMATED, "Estimated"),
+            )
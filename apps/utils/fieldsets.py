@@ -0,0 +1,104 @@
+from rest_framework import serializers
+
+FIELDS_PARAM = "fields"
+EXPAND_PARAM = "expand"
+
+
+def parse_paths(value):
+    """
+    Turns a comma separated list of dotted paths into a tree of names,
+    "vendor.user,items" giving {"vendor": {"user": {}}, "items": {}}.
+    """
+    tree = {}
+    for path in (value or "").split(","):
+        node = tree
+        for name in filter(None, (name.strip() for name in path.split("."))):
+            node = node.setdefault(name, {})
+    return tree
+
+
+class ExpandableFieldsMixin(object):
+    """
+    Serializer rendering only the `fields` asked for and nesting only the
+    relations in `expand`, the others being rendered as primary keys. Both
+    are trees from parse_paths, read from the `?fields=` and `?expand=` query
+    parameters when the serializer is given the request. Without `expand` the
+    `default_expand` relations are nested.
+    """
+
+    # name -> (serializer class, keyword arguments) of the relations that can be nested
+    expandable_fields = {}
+    default_expand = ()
+    # name -> prefetch_related lookup a field reads from
+    field_prefetches = {}
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = kwargs.get("context", {}).get("request")
+        if fields is None and expand is None and request is not None:
+            fields = parse_paths(request.query_params.get(FIELDS_PARAM)) or None
+            if EXPAND_PARAM in request.query_params:
+                expand = parse_paths(request.query_params.get(EXPAND_PARAM))
+        self.sparse_fields = fields
+        self.expand = expand
+
+    def get_expand(self):
+        if self.expand is None:
+            expand = {name: None for name in self.default_expand}
+        else:
+            expand = dict(self.expand)
+        # a nested field asked for implies its relation is expanded
+        for name, children in (self.sparse_fields or {}).items():
+            if children and name in self.expandable_fields:
+                expand.setdefault(name, {})
+        unknown = set(expand) - set(self.expandable_fields)
+        if unknown:
+            raise ValueError(f"Cannot expand {', '.join(sorted(unknown))}")
+        return expand
+
+    def get_fields(self):
+        fields = super().get_fields()
+        expand = self.get_expand()
+        for name, (serializer_class, kwargs) in self.expandable_fields.items():
+            if name in expand:
+                fields[name] = serializer_class(
+                    read_only=True,
+                    fields=(self.sparse_fields or {}).get(name) or None,
+                    expand=expand[name],
+                    **kwargs,
+                )
+            else:
+                fields[name] = serializers.PrimaryKeyRelatedField(read_only=True, **kwargs)
+
+        if self.sparse_fields:
+            unknown = set(self.sparse_fields) - set(fields)
+            if unknown:
+                raise ValueError(f"Unknown fields {', '.join(sorted(unknown))}")
+            fields = {name: field for name, field in fields.items() if name in self.sparse_fields}
+        return fields
+
+    def related_lookups(self, prefix="", joined=True):
+        """
+        The select_related and prefetch_related lookups of the relations the
+        serializer renders. Single relations reached through single relations
+        are joined, the others prefetched.
+        """
+        select_related, prefetch_related = [], []
+        for name, field in self.fields.items():
+            if name in self.field_prefetches:
+                prefetch_related.append(prefix + self.field_prefetches[name])
+            many = isinstance(field, (serializers.ListSerializer, serializers.ManyRelatedField))
+            nested = field.child if isinstance(field, serializers.ListSerializer) else field
+            if field.source == "*" or not (many or isinstance(nested, serializers.BaseSerializer)):
+                continue
+
+            path = prefix + field.source.replace(".", "__")
+            if joined and not many:
+                select_related.append(path)
+            else:
+                prefetch_related.append(path)
+            if isinstance(nested, ExpandableFieldsMixin):
+                nested_select, nested_prefetch = nested.related_lookups(f"{path}__", joined and not many)
+                select_related += nested_select
+                prefetch_related += nested_prefetch
+        return select_related, prefetch_related
@@ -0,0 +1,99 @@
+import hashlib
+import math
+import os
+import threading
+
+from django.apps import apps
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+DIGITS = "0123456789"
+ALPHANUMERIC = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+SAVE_ATTEMPTS = 5
+
+_blocks = {}
+_lock = threading.Lock()
+
+
+def sequence_numbers(name, count):
+    """
+    `count` unused numbers of the sequence, taken from this process's reserved
+    block and reserving another one from the database when it runs out.
+    Inside a transaction, which may still roll the reservation back, only the
+    missing numbers are reserved and none are kept for later calls.
+    """
+    IdentifierSequence = apps.get_model("users", "IdentifierSequence")
+    numbers = []
+    with _lock:
+        block = _blocks.get(name)
+        # a forked worker must not hand out its parent's numbers
+        if block is not None and block["pid"] != os.getpid():
+            block = None
+        while len(numbers) < count:
+            if block is None or block["next"] == block["end"]:
+                if IdentifierSequence.in_transaction():
+                    size = count - len(numbers)
+                    start = IdentifierSequence.reserve(name, size)
+                    numbers.extend(range(start, start + size))
+                    break
+                size = max(settings.IDENTIFIER_BLOCK_SIZE, count - len(numbers))
+                start = IdentifierSequence.reserve(name, size)
+                block = {"pid": os.getpid(), "next": start, "end": start + size}
+                _blocks[name] = block
+            taken = min(count - len(numbers), block["end"] - block["next"])
+            numbers.extend(range(block["next"], block["next"] + taken))
+            block["next"] += taken
+    return numbers
+
+
+def format_identifier(number, name, length, allowed_chars):
+    """
+    Spreads sequence numbers over all identifiers of `length` characters with
+    an affine permutation, so consecutive numbers give unrelated looking
+    identifiers that never repeat until the keyspace is used up.
+    """
+    base = len(allowed_chars)
+    keyspace = base ** length
+    if number >= keyspace:
+        raise ValueError(f"The {name} identifiers are exhausted")
+    multiplier = int(keyspace * (math.sqrt(5) - 1) / 2)
+    while math.gcd(multiplier, keyspace) != 1:
+        multiplier += 1
+    offset = int(hashlib.md5(name.encode()).hexdigest(), 16) % keyspace
+    value = (number * multiplier + offset) % keyspace
+
+    characters = []
+    for _ in range(length):
+        value, digit = divmod(value, base)
+        characters.append(allowed_chars[digit])
+    return "".join(reversed(characters))
+
+
+def allocate_identifiers(model, field, count=1, length=6, allowed_chars=DIGITS):
+    """
+    `count` new identifiers for `field` of `model`, without querying the
+    table. Identifiers left over from before the allocator may still clash,
+    which the unique constraint catches, see save_with_identifier.
+    """
+    name = f"{model._meta.db_table}.{field}.{length}"
+    return [
+        format_identifier(number, name, length, allowed_chars) for number in sequence_numbers(name, count)
+    ]
+
+
+def save_with_identifier(save, allocate, attempts=SAVE_ATTEMPTS):
+    """
+    Calls `save` with what `allocate` returns, allocating again and retrying
+    when the insert violates a unique constraint. Each attempt runs in its
+    own savepoint so a clash does not break the surrounding transaction.
+    Allocating happens outside the savepoint, which would otherwise undo the
+    reservation along with the failed insert.
+    """
+    for attempt in range(attempts):
+        identifier = allocate()
+        try:
+            with transaction.atomic():
+                return save(identifier)
+        except IntegrityError:
+            if attempt == attempts - 1:
+                raise
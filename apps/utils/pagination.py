@@ -1,33 +1,97 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import F, Q
+from django.http import StreamingHttpResponse
 from rest_framework import status
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.utils.encoders import JSONEncoder
+
+from apps.utils.counting import count_queryset
 
 DEFAULT_PAGE = 1
 DEFAULT_PAGE_SIZE = 50
+STREAM_CHUNK_SIZE = 2000
+STREAM_CONTENT_TYPES = {"json": "application/json", "ndjson": "application/x-ndjson"}
+
+
+def default_ordering(model):
+    """
+    The model's default ordering with the primary key as a tiebreaker, so
+    lists come back in a meaningful and stable order.
+    """
+    ordering = list(model._meta.ordering) or ["-pk"]
+    if not any(field.lstrip("-") in ("pk", model._meta.pk.name) for field in ordering):
+        ordering.append("-pk" if ordering[0].startswith("-") else "pk")
+    return ordering
+
+
+class CountedPaginator(Paginator):
+    """
+    Paginator taking its total from the count strategy instead of counting.
+    """
+
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count = count
 
 
 class CustomPaginator(PageNumberPagination):
     page = DEFAULT_PAGE
     page_size = DEFAULT_PAGE_SIZE
     page_size_query_param = "limit"
+    cursor_query_param = "cursor"
+    stream_query_param = "stream"
+
+    def counts_total(self, request):
+        """
+        Whether the list response to `request` counts the rows. Cursor pages
+        and streamed lists do not.
+        """
+        if self.cursor_query_param in request.GET:
+            return False
+        return not (request.GET.get("is_paging") == "false" and self.stream_query_param in request.GET)
+
+    def generate_response(self, query_set, serializer_obj, request, view=None, count=None):
+        """
+        A page of the list, or the whole of it, serialized. A `count` the
+        caller already has stands in for counting the rows again.
+        """
+        if self.cursor_query_param in request.GET and not isinstance(query_set, list):
+            return self.generate_cursor_response(query_set, serializer_obj, request)
+
+        if request.GET.get("is_paging") == "false" and self.stream_query_param in request.GET:
+            return self.generate_stream_response(query_set, serializer_obj, request)
 
-    def generate_response(self, query_set, serializer_obj, request):
         if request.GET.get("is_paging") == "false":
-            page_data = query_set
+            page_data = list(query_set)
             serialized_page = serializer_obj(
                 page_data, many=True, context={"request": request}
             )
             response = {
                 "status": status.HTTP_200_OK,
                 "message": "ok",
-                "total": query_set.count(),
+                "total": len(page_data),
                 "total_pages": 1,
                 "page": int(request.GET.get("page", DEFAULT_PAGE)),
-                "limit": query_set.count(),
+                "limit": len(page_data),
                 "results": serialized_page.data,
             }
         else:
+            if isinstance(query_set, list):
+                count = len(query_set)
+            elif count is None:
+                count = count_queryset(query_set, getattr(view, "count_strategy", None), request, view)
+            paginator = CountedPaginator(query_set, self.get_page_size(request), count=count)
+            page_number = request.GET.get(self.page_query_param, DEFAULT_PAGE)
+            if page_number in self.last_page_strings:
+                page_number = paginator.num_pages
             try:
-                page_data = self.paginate_queryset(query_set, request)
+                page_data = paginator.page(page_number)
             except Exception as ex:
                 response = {
                     "status": status.HTTP_400_BAD_REQUEST,
@@ -40,10 +104,171 @@ class CustomPaginator(PageNumberPagination):
             response = {
                 "status": status.HTTP_200_OK,
                 "message": "ok",
-                "total": self.page.paginator.count,
-                "total_pages": self.page.paginator.num_pages,
+                "total": paginator.count,
+                "total_pages": paginator.num_pages,
                 "page": int(request.GET.get("page", DEFAULT_PAGE)),
                 "limit": int(request.GET.get("page_size", self.page_size)),
                 "results": serialized_page.data,
             }
         return response
+
+    def generate_stream_response(self, query_set, serializer_obj, request):
+        """
+        Streams the whole list as a JSON array or as newline delimited JSON,
+        fetching and serializing it a chunk of rows at a time so memory stays
+        flat however long the list is.
+        """
+        stream_format = request.GET.get(self.stream_query_param)
+        if stream_format not in STREAM_CONTENT_TYPES:
+            # a ValueError reaches the view, which answers it with a 400
+            raise ValueError(f"stream must be one of {', '.join(STREAM_CONTENT_TYPES)}")
+        serializer = serializer_obj(context={"request": request})
+        # resolve the fields now so invalid ones fail before streaming starts
+        serializer.fields
+        if not isinstance(query_set, list):
+            query_set = query_set.iterator(chunk_size=STREAM_CHUNK_SIZE)
+        encoder = JSONEncoder()
+
+        def rows():
+            for obj in query_set:
+                yield encoder.encode(serializer.to_representation(obj))
+
+        def json_array():
+            yield "["
+            for number, row in enumerate(rows()):
+                yield row if number == 0 else "," + row
+            yield "]"
+
+        def ndjson():
+            for row in rows():
+                yield row + "\n"
+
+        content = json_array() if stream_format == "json" else ndjson()
+        return StreamingHttpResponse(content, content_type=STREAM_CONTENT_TYPES[stream_format])
+
+    def generate_cursor_response(self, query_set, serializer_obj, request):
+        """
+        Keyset pagination over the queryset's ordering. Each page seeks past
+        the previous one instead of counting and offsetting, so deep pages are
+        as fast as the first. An empty cursor starts from the beginning.
+        """
+        limit = self.get_page_size(request)
+        # a ValueError reaches the view, which answers it with a 400
+        keys = self.keyset_fields(query_set)
+        values, backwards = self.decode_cursor(request.GET.get(self.cursor_query_param), query_set.model, keys)
+
+        queryset = query_set.order_by(*self.keyset_ordering(query_set.model, keys, backwards))
+        if values is not None:
+            queryset = queryset.filter(self.keyset_filter(query_set.model, keys, values, backwards))
+        rows = list(queryset[: limit + 1])
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if backwards:
+            rows.reverse()
+
+        has_next = has_more if not backwards else True
+        has_previous = has_more if backwards else values is not None
+        serialized_page = serializer_obj(rows, many=True, context={"request": request})
+        return {
+            "status": status.HTTP_200_OK,
+            "message": "ok",
+            "limit": limit,
+            "next": self.encode_cursor(rows[-1], keys, False) if rows and has_next else None,
+            "previous": self.encode_cursor(rows[0], keys, True) if rows and has_previous else None,
+            "results": serialized_page.data,
+        }
+
+    @staticmethod
+    def keyset_fields(query_set):
+        """
+        (field name, descending) pairs the queryset is ordered on, ending with
+        the primary key so every row has a unique position.
+        """
+        model = query_set.model
+        ordering = query_set.query.order_by or default_ordering(model)
+        keys = []
+        for field in ordering:
+            if not isinstance(field, str) or field.startswith("?"):
+                raise ValueError("This ordering does not support cursor pagination")
+            name = field.lstrip("-")
+            if name == "pk":
+                name = model._meta.pk.name
+            try:
+                model_field = model._meta.get_field(name)
+            except Exception:
+                raise ValueError(f"Cursor pagination cannot order on {name}")
+            if model_field.is_relation:
+                raise ValueError(f"Cursor pagination cannot order on {name}")
+            keys.append((name, field.startswith("-")))
+        if model._meta.pk.name not in [name for name, _ in keys]:
+            keys.append((model._meta.pk.name, keys[0][1] if keys else False))
+        return keys
+
+    @staticmethod
+    def keyset_ordering(model, keys, backwards):
+        # nulls sort last going forwards, so paging backwards puts them first.
+        # Columns without nulls keep a plain ordering so an index can serve it.
+        ordering = []
+        for name, descending in keys:
+            descending = descending != backwards
+            if not model._meta.get_field(name).null:
+                ordering.append(F(name).desc() if descending else F(name).asc())
+            elif backwards:
+                ordering.append(F(name).desc(nulls_first=True) if descending else F(name).asc(nulls_first=True))
+            else:
+                ordering.append(F(name).desc(nulls_last=True) if descending else F(name).asc(nulls_last=True))
+        return ordering
+
+    @staticmethod
+    def keyset_filter(model, keys, values, backwards):
+        """
+        Rows strictly past `values` in the ordering, or before them when
+        paging `backwards`, as a lexicographic comparison over the keys.
+        """
+        condition = None
+        for (name, descending), value in reversed(list(zip(keys, values))):
+            nullable = model._meta.get_field(name).null
+            lookup = "lt" if descending != backwards else "gt"
+            if value is None:
+                past = Q(**{f"{name}__isnull": False}) if backwards else Q(pk__in=[])
+                equal = Q(**{f"{name}__isnull": True})
+            else:
+                past = Q(**{f"{name}__{lookup}": value})
+                if nullable and not backwards:
+                    past |= Q(**{f"{name}__isnull": True})
+                equal = Q(**{name: value})
+            condition = past if condition is None else past | (equal & condition)
+        return condition
+
+    @staticmethod
+    def encode_cursor(obj, keys, backwards):
+        values = []
+        for name, _ in keys:
+            value = getattr(obj, name)
+            if isinstance(value, (date, datetime)):
+                value = value.isoformat()
+            elif value is not None:
+                value = str(value)
+            values.append(value)
+        payload = json.dumps({"v": values, "b": backwards}).encode()
+        return base64.urlsafe_b64encode(payload).decode()
+
+    @staticmethod
+    def decode_cursor(cursor, model, keys):
+        """
+        Returns the key values and direction of a cursor, no values meaning
+        the first page.
+        """
+        if not cursor:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if len(payload["v"]) != len(keys):
+                raise ValueError("Invalid cursor")
+            values = [
+                None if value is None else model._meta.get_field(name).to_python(value)
+                for (name, _), value in zip(keys, payload["v"])
+            ]
+            return values, bool(payload["b"])
+        except (ValueError, KeyError, TypeError, binascii.Error, ValidationError):
+            raise ValueError("Invalid cursor")
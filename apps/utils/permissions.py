@@ -2,7 +2,7 @@ from functools import wraps
 
 from rest_framework import status
 from rest_framework.response import Response
-from apps.utils.enums import UserGroup
+from apps.utils.authentication import get_principal
 
 
 def vendor_access_only():
@@ -13,7 +13,8 @@ def vendor_access_only():
     def decorator(func):
         @wraps(func)
         def wrapper(request, *args, **kwargs):
-            if not request.user.groups.filter(name=UserGroup.VENDOR).exists():
+            principal = get_principal(request)
+            if principal is None or not principal.is_vendor:
                 return Response(
                     {
                         "status": status.HTTP_403_FORBIDDEN,
@@ -36,9 +37,8 @@ def buyer_access_only():
     def decorator(func):
         @wraps(func)
         def wrapper(request, *args, **kwargs):
-            if not request.user.groups.filter(
-                name=UserGroup.BUYER
-            ).exists():
+            principal = get_principal(request)
+            if principal is None or not principal.is_buyer:
                 return Response(
                     {
                         "status": status.HTTP_403_FORBIDDEN,
@@ -1,36 +1,22 @@
 import uuid
-from django.utils.crypto import get_random_string
+
+from apps.utils.identifiers import ALPHANUMERIC, DIGITS, allocate_identifiers
 
 
 def unique_alpha_numeric_generator(
     model,
     field,
     length=6,
-    allowed_chars="ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789",
+    allowed_chars=ALPHANUMERIC,
 ):
-    unique = get_random_string(length=length, allowed_chars=allowed_chars)
-    kwargs = {field: unique}
-    qs_exists = model.objects.filter(**kwargs).exists()
-    if qs_exists:
-        return unique_alpha_numeric_generator(model, field)
-    return unique
+    return allocate_identifiers(model, field, 1, length, allowed_chars)[0]
 
 
 def unique_number_generator(
-    model, field, length=6, allowed_chars="0123456789"
+    model, field, length=6, allowed_chars=DIGITS
 ):
-    unique = get_random_string(length=length, allowed_chars=allowed_chars)
-    kwargs = {field: unique}
-    qs_exists = model.objects.filter(**kwargs).exists()
-    if qs_exists:
-        return unique_number_generator(model, field, length)
-    return unique
+    return allocate_identifiers(model, field, 1, length, allowed_chars)[0]
 
 
 def generate_uuid(model, column):
-    unique = str(uuid.uuid4())
-    kwargs = {column: unique}
-    qs_exists = model.objects.filter(**kwargs).exists()
-    if qs_exists:
-        return generate_uuid(model, column)
-    return unique
+    return str(uuid.uuid4())
@@ -114,7 +114,7 @@ SIMPLE_JWT = {
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "rest_framework.schemas.coreapi.AutoSchema",
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "apps.utils.authentication.PrincipalJWTAuthentication",
     ),
     "EXCEPTION_HANDLER": "apps.utils.custom_exception_handler.custom_exception_handler",
     "DEFAULT_PAGINATION_CLASS": "apps.utils.pagination.CustomPaginator",
@@ -139,6 +139,31 @@ DATABASES = {
 }
 
 
+CACHES = {
+    "default": {
+        "BACKEND": config(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": config("CACHE_LOCATION", ""),
+    }
+}
+
+# Seconds vendor performance metrics stay cached, purchase order changes invalidate them
+VENDOR_METRICS_CACHE_TIMEOUT = config("VENDOR_METRICS_CACHE_TIMEOUT", default=300, cast=int)
+
+# How paginated lists count their totals, exact, cached or estimated (PostgreSQL only)
+LIST_COUNT_STRATEGY = config("LIST_COUNT_STRATEGY", default="exact")
+# Seconds cached list totals live, writes to the counted model invalidate them
+LIST_COUNT_CACHE_TIMEOUT = config("LIST_COUNT_CACHE_TIMEOUT", default=60, cast=int)
+
+# Identifier sequence numbers each process reserves at a time for po numbers and vendor codes
+IDENTIFIER_BLOCK_SIZE = config("IDENTIFIER_BLOCK_SIZE", default=100, cast=int)
+
+# Whether updating a purchase order follows the status transitions of the bulk endpoint,
+# off by default since it rejects updates clients could make before
+PO_ENFORCE_STATUS_TRANSITIONS = config("PO_ENFORCE_STATUS_TRANSITIONS", default=False, cast=bool)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -204,6 +229,12 @@ if DEBUG is False:
 
 BASE_BE_URL = config("BASE_BE_URL", "api/auth")
 
+# Days of raw vendor performance snapshots kept by compact_vendor_history, 0 keeps all
+VENDOR_HISTORY_RETENTION_DAYS = config("VENDOR_HISTORY_RETENTION_DAYS", default=0, cast=int)
+
+# Seconds of purchase order changes folded into one vendor metric checkpoint
+VENDOR_CHECKPOINT_INTERVAL = config("VENDOR_CHECKPOINT_INTERVAL", default=3600, cast=int)
+
 
 # LOGGING CONFIGURATION
 LOGS_DIR = os.path.join(PROJECT_DIR, "../logs")
@@ -1,5 +1,22 @@
+import json
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db import IntegrityError, connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework import status
 
+from apps.purchase_orders.models import Item, PurchaseOrder, VersionConflict
+from apps.purchase_orders.serializer import PurchaseOrderFormSerializer
+from apps.users.models import IdentifierSequence, User, VendorMetricAccumulator, VendorProfile
+from apps.utils import identifiers
+from apps.utils.pagination import CustomPaginator
+from apps.utils.enums import UserGroup
+
 endpoint = "/api/v1/vendors/purchase-order/"
 
 
@@ -13,3 +30,478 @@ def test_auth_po_list(vendor_auth_client, vendor):
     assert res.status_code == status.HTTP_200_OK
 
 
+
+
+def create_pos(vendor, buyer_user, count):
+    item = Item.objects.create(name="playstation 5")
+    now = timezone.now()
+    for number in range(count):
+        po = PurchaseOrder.objects.create(
+            vendor=vendor, buyer=buyer_user, po_number=f"2000000000{number:02d}", delivery_date=now
+        )
+        po.items.add(item)
+
+
+def list_query_count(client, url, page_size):
+    # cached list totals would spare the second request its count
+    cache.clear()
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, {"limit": page_size})
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.data["data"]["results"]) == page_size
+    return len(context.captured_queries)
+
+
+def test_vendor_po_lists_constant_queries(vendor_auth_client, vendor):
+    buyer_user = User.objects.create(username="po-buyer", mobile="08000000000")
+    create_pos(vendor, buyer_user, 12)
+
+    for url in ("/api/v1/purchase_orders/", endpoint):
+        assert list_query_count(vendor_auth_client, url, 2) == list_query_count(vendor_auth_client, url, 12)
+
+
+def test_buyer_po_list_constant_queries(buyer_auth_client, buyer):
+    vendor_user = User.objects.create(username="po-vendor", mobile="08000000001")
+    vendor_user.groups.add(Group.objects.get_or_create(name=UserGroup.VENDOR)[0])
+    vendor = VendorProfile.objects.create(user=vendor_user, business_name="PO vendor")
+    create_pos(vendor, buyer.user, 12)
+
+    url = "/api/v1/buyers/purchase-order/"
+    assert list_query_count(buyer_auth_client, url, 2) == list_query_count(buyer_auth_client, url, 12)
+
+
+def test_po_list_cursor_pagination(vendor_auth_client, vendor):
+    buyer_user = User.objects.create(username="po-buyer", mobile="08000000000")
+    create_pos(vendor, buyer_user, 5)
+    # ties on order_date are broken by the primary key
+    PurchaseOrder.objects.filter(po_number__in=["200000000001", "200000000002"]).update(
+        order_date=PurchaseOrder.objects.get(po_number="200000000003").order_date
+    )
+    expected = [
+        str(po.id)
+        for po in sorted(PurchaseOrder.objects.all(), key=lambda po: (po.order_date, po.id), reverse=True)
+    ]
+
+    pages, cursor = [], ""
+    while cursor is not None:
+        with CaptureQueriesContext(connection) as context:
+            response = vendor_auth_client.get(endpoint, {"cursor": cursor, "limit": 2})
+        # order_date and id hold no nulls, so the ordering stays index friendly
+        assert not any("NULLS" in query["sql"] for query in context.captured_queries)
+        assert response.status_code == status.HTTP_200_OK
+        data = response.data["data"]
+        assert "total" not in data
+        pages.append([po["id"] for po in data["results"]])
+        cursor = data["next"]
+    assert pages == [expected[0:2], expected[2:4], expected[4:5]]
+
+    response = vendor_auth_client.get(endpoint, {"cursor": data["previous"], "limit": 2})
+    assert [po["id"] for po in response.data["data"]["results"]] == expected[2:4]
+    response = vendor_auth_client.get(endpoint, {"cursor": response.data["data"]["previous"], "limit": 2})
+    assert [po["id"] for po in response.data["data"]["results"]] == expected[0:2]
+    assert response.data["data"]["previous"] is None
+
+    for cursor in ("not-a-cursor", CustomPaginator.encode_cursor(PurchaseOrder.objects.first(), [("id", True)], False)):
+        response = vendor_auth_client.get(endpoint, {"cursor": cursor})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data["message"] == "Invalid cursor"
+
+
+@override_settings(LIST_COUNT_STRATEGY="cached")
+def test_po_list_cached_count(vendor_auth_client, vendor):
+    buyer_user = User.objects.create(username="po-buyer", mobile="08000000000")
+    create_pos(vendor, buyer_user, 3)
+    url = "/api/v1/purchase_orders/"
+
+    assert vendor_auth_client.get(url).data["data"]["total"] == 3
+    with CaptureQueriesContext(connection) as context:
+        assert vendor_auth_client.get(url, {"page": 1}).data["data"]["total"] == 3
+    assert not any("COUNT(" in query["sql"] for query in context.captured_queries)
+
+    PurchaseOrder.objects.get(po_number="200000000001").delete()
+    assert vendor_auth_client.get(url).data["data"]["total"] == 2
+    assert vendor_auth_client.get(url, {"status": "pending"}).data["data"]["total"] == 2
+
+
+def test_po_list_filters(vendor_auth_client, vendor):
+    buyer_user = User.objects.create(username="po-buyer", mobile="08000000000")
+    create_pos(vendor, buyer_user, 4)
+    now = timezone.now()
+    for number, (days, status_value, rating) in enumerate(
+        [(40, "pending", 1.0), (20, "completed", 3.5), (10, "canceled", 4.0), (0, "completed", 5.0)]
+    ):
+        PurchaseOrder.objects.filter(po_number=f"2000000000{number:02d}").update(
+            order_date=now - timedelta(days=days), status=status_value, quality_rating=rating
+        )
+    url = "/api/v1/purchase_orders/"
+
+    def po_numbers(params):
+        response = vendor_auth_client.get(url, params)
+        assert response.status_code == status.HTTP_200_OK
+        return [row["po_number"] for row in response.data["data"]["results"]]
+
+    from_date = (now - timedelta(days=25)).date().isoformat()
+    to_date = (now - timedelta(days=5)).date().isoformat()
+    assert po_numbers({"order_date_from": from_date, "order_date_to": to_date}) == ["200000000002", "200000000001"]
+    assert po_numbers({"status__in": "pending,canceled"}) == ["200000000002", "200000000000"]
+    assert po_numbers({"quality_rating__gte": 4, "ordering": "quality_rating"}) == ["200000000002", "200000000003"]
+    assert po_numbers({"status": "completed", "search": "200000000003"}) == ["200000000003"]
+
+    response = vendor_auth_client.get(url, {"order_date_from": "yesterday"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_po_list_full_text_search(vendor_auth_client, vendor):
+    buyer_user = User.objects.create(username="po-buyer", mobile="08000000000")
+    create_pos(vendor, buyer_user, 3)
+    console = Item.objects.create(name="Xbox console")
+    PurchaseOrder.objects.get(po_number="200000000001").items.add(console)
+    url = "/api/v1/purchase_orders/"
+
+    def po_numbers(search):
+        response = vendor_auth_client.get(url, {"search": search})
+        assert response.status_code == status.HTTP_200_OK
+        return sorted(row["po_number"] for row in response.data["data"]["results"])
+
+    assert po_numbers("xbox cons") == ["200000000001"]
+    assert po_numbers("playstation") == ["200000000000", "200000000001", "200000000002"]
+    assert po_numbers("2000000000") == ["200000000000", "200000000001", "200000000002"]
+
+    console.name = "Switch"
+    console.save()
+    assert po_numbers("xbox") == []
+    assert po_numbers("switch") == ["200000000001"]
+
+    vendor.business_name = "Acme Supplies"
+    vendor.save()
+    assert len(po_numbers("acme")) == 3
+
+    PurchaseOrder.objects.get(po_number="200000000001").items.remove(console)
+    assert po_numbers("switch") == []
+
+
+def test_po_list_sparse_fields_and_expand(vendor_auth_client, vendor):
+    buyer_user = User.objects.create(username="po-buyer", mobile="08000000000")
+    create_pos(vendor, buyer_user, 3)
+    url = "/api/v1/purchase_orders/"
+
+    params = {"fields": "po_number,status,delivery_date,vendor.business_name"}
+    cache.clear()
+    with CaptureQueriesContext(connection) as sparse:
+        response = vendor_auth_client.get(url, params)
+    row = response.data["data"]["results"][0]
+    assert set(row) == {"po_number", "status", "delivery_date", "vendor"}
+    assert row["vendor"] == {"business_name": vendor.business_name}
+    cache.clear()
+    with CaptureQueriesContext(connection) as full:
+        vendor_auth_client.get(url)
+    assert len(sparse.captured_queries) < len(full.captured_queries)
+
+    row = vendor_auth_client.get(url, {"expand": "buyer"}).data["data"]["results"][0]
+    assert row["vendor"] == vendor.id
+    assert row["buyer"]["username"] == "po-buyer"
+    assert len(row["items"]) == 1 and not isinstance(row["items"][0], dict)
+
+    row = vendor_auth_client.get(url, {"expand": "vendor"}).data["data"]["results"][0]
+    assert row["vendor"]["user"] == vendor.user_id
+
+    response = vendor_auth_client.get(url, {"expand": "owner"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_po_list_streamed_export(vendor_auth_client, vendor):
+    buyer_user = User.objects.create(username="po-buyer", mobile="08000000000")
+    create_pos(vendor, buyer_user, 3)
+    url = "/api/v1/purchase_orders/"
+    params = {"is_paging": "false", "fields": "po_number,items"}
+
+    response = vendor_auth_client.get(url, {**params, "stream": "json"})
+    assert response.streaming and response["Content-Type"] == "application/json"
+    rows = json.loads(b"".join(response.streaming_content))
+    assert sorted(row["po_number"] for row in rows) == ["200000000000", "200000000001", "200000000002"]
+    assert rows[0]["items"] == [{"name": "playstation 5", "quantity": 1}]
+
+    response = vendor_auth_client.get(url, {**params, "stream": "ndjson"})
+    assert response["Content-Type"] == "application/x-ndjson"
+    lines = b"".join(response.streaming_content).decode().splitlines()
+    assert [json.loads(line) for line in lines] == rows
+
+    response = vendor_auth_client.get(url, {"is_paging": "false", "stream": "csv"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.data["message"] == "stream must be one of json, ndjson"
+
+
+def test_po_conditional_get(vendor_auth_client, vendor):
+    buyer_user = User.objects.create(username="po-buyer", mobile="08000000000")
+    create_pos(vendor, buyer_user, 2)
+    po = PurchaseOrder.objects.get(po_number="200000000000")
+
+    for url in ("/api/v1/purchase_orders/", f"/api/v1/purchase_orders/{po.id}/"):
+        response = vendor_auth_client.get(url)
+        etag = response["ETag"]
+        assert response.status_code == status.HTTP_200_OK and response.has_header("Last-Modified")
+
+        with CaptureQueriesContext(connection) as context:
+            response = vendor_auth_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED and response["ETag"] == etag
+        assert not any('"item"' in query["sql"] for query in context.captured_queries)
+
+        PurchaseOrder.objects.filter(pk=po.pk).update(updated_at=timezone.now() + timedelta(seconds=5))
+        response = vendor_auth_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK and response["ETag"] != etag
+
+    etag = vendor_auth_client.get("/api/v1/vendors/profile/")["ETag"]
+    response = vendor_auth_client.get("/api/v1/vendors/profile/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    vendor.business_name = "Renamed vendor"
+    vendor.save()
+    response = vendor_auth_client.get("/api/v1/vendors/profile/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    # completing a purchase order moves the vendor's metrics
+    etag = response["ETag"]
+    po.status = "completed"
+    po.save()
+    response = vendor_auth_client.get("/api/v1/vendors/profile/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+
+    # cursor pages and streams do not count the list just to build validators
+    for params in ({"cursor": ""}, {"is_paging": "false", "stream": "ndjson"}):
+        with CaptureQueriesContext(connection) as context:
+            response = vendor_auth_client.get("/api/v1/purchase_orders/", params)
+        assert response.status_code == status.HTTP_200_OK and not response.has_header("ETag")
+        assert not any("COUNT(" in query["sql"] for query in context.captured_queries)
+    with CaptureQueriesContext(connection) as context:
+        vendor_auth_client.get("/api/v1/purchase_orders/", {"page": 1})
+    assert sum("COUNT(" in query["sql"] for query in context.captured_queries) == 1
+
+
+def test_po_bulk_create(buyer_auth_client, buyer):
+    vendor_user = User.objects.create(username="po-vendor", mobile="08000000001")
+    vendor = VendorProfile.objects.create(user=vendor_user, business_name="PO vendor")
+    url = "/api/v1/purchase_orders/bulk/"
+
+    def rows(count):
+        return [
+            {
+                "vendor_id": str(vendor.id),
+                "delivery_date": "2026-01-01T10:00:00Z",
+                "status": "completed",
+                "quality_rating": 4.0,
+                "items": [{"name": f"item {number % 3}", "quantity": 2}, {"name": "cable", "quantity": 1}],
+            }
+            for number in range(count)
+        ]
+
+    def bulk_query_count(count):
+        with CaptureQueriesContext(connection) as context:
+            response = buyer_auth_client.post(url, {"purchase_orders": rows(count)}, format="json")
+        assert response.status_code == status.HTTP_201_CREATED, response.data
+        assert len(response.data["data"]) == count
+        return len(context.captured_queries)
+
+    # the first request also creates the items and the vendor's running totals
+    bulk_query_count(3)
+    assert bulk_query_count(2) == bulk_query_count(20)
+    assert PurchaseOrder.objects.filter(vendor=vendor).count() == 25
+    assert Item.objects.filter(name="cable").count() == 1
+    accumulator = VendorMetricAccumulator.objects.get(vendor=vendor)
+    assert accumulator.total_po_count == 25 and accumulator.completed_count == 25
+
+    invalid = rows(1) + [{"vendor_id": "unknown", "items": []}, {"delivery_date": "soon"}]
+    response = buyer_auth_client.post(url, invalid, format="json")
+    assert response.status_code == status.HTTP_201_CREATED
+    assert len(response.data["data"]) == 1
+    assert response.data["data"][0]["quantity"] == 3
+    assert [error["index"] for error in response.data["errors"]] == [1, 2]
+    assert buyer_auth_client.get("/api/v1/purchase_orders/", {"search": "cable"}).data["data"]["total"] == 26
+
+
+def test_po_items_written_in_constant_queries(vendor):
+    po = PurchaseOrder.objects.create(vendor=vendor, po_number="200000000099", delivery_date=timezone.now())
+
+    def update_query_count(prefix, count):
+        items = [{"name": f"{prefix} {number}", "quantity": 1} for number in range(count)]
+        with CaptureQueriesContext(connection) as context:
+            PurchaseOrderFormSerializer().update(po, {"items": items})
+        return len(context.captured_queries)
+
+    update_query_count("first", 5)
+    # each update replaces the five lines linked before it
+    assert update_query_count("small", 5) == update_query_count("large", 50)
+    assert sorted(po.items.values_list("name", flat=True)) == sorted(f"large {number}" for number in range(50))
+
+    kept = set(po.items.filter(name__in=["large 1", "large 2"]).values_list("pk", flat=True))
+    PurchaseOrderFormSerializer().update(
+        po, {"items": [{"name": "large 1", "quantity": 1}, {"name": "large 2", "quantity": 1}]}
+    )
+    assert set(po.items.values_list("pk", flat=True)) == kept
+
+
+def test_po_numbers_allocated_without_lookups(buyer_auth_client, buyer):
+    vendor_user = User.objects.create(username="po-vendor", mobile="08000000001")
+    vendor = VendorProfile.objects.create(user=vendor_user, business_name="PO vendor")
+    identifiers._blocks.clear()
+
+    numbers = identifiers.allocate_identifiers(PurchaseOrder, "po_number", 250, 12)
+    assert len(set(numbers)) == 250
+    assert all(len(number) == 12 and number.isdigit() for number in numbers)
+
+    # an order numbered before the allocator holds the next number
+    clash = identifiers.format_identifier(250, "purchase_order.po_number.12", 12, identifiers.DIGITS)
+    PurchaseOrder.objects.create(vendor=vendor, po_number=clash, delivery_date=timezone.now())
+    payload = {
+        "vendor_id": str(vendor.id),
+        "delivery_date": "2026-01-01T10:00:00Z",
+        "items": [{"name": "cable", "quantity": 1}],
+    }
+    with CaptureQueriesContext(connection) as context:
+        response = buyer_auth_client.post("/api/v1/purchase_orders/", payload, format="json")
+    assert response.status_code == status.HTTP_201_CREATED, response.data
+    assert response.data["data"]["po_number"] not in numbers + [clash]
+    assert response.data["data"]["items"][0]["name"] == "cable"
+    assert not any(
+        query["sql"].startswith("SELECT") and '"po_number" =' in query["sql"] for query in context.captured_queries
+    )
+
+
+def test_identifier_reservation_survives_failed_save(db):
+    identifiers._blocks.clear()
+    attempts = []
+
+    def save(po_number):
+        attempts.append(po_number)
+        if len(attempts) == 1:
+            raise IntegrityError("UNIQUE constraint failed: purchase_order.po_number")
+        return po_number
+
+    def allocate():
+        return identifiers.allocate_identifiers(PurchaseOrder, "po_number", 1, 12)[0]
+
+    po_number = identifiers.save_with_identifier(save, allocate)
+    assert attempts == [attempts[0], po_number] and po_number != attempts[0]
+    # the failed insert did not take the reservation back with it
+    assert IdentifierSequence.objects.get(name="purchase_order.po_number.12").next_value >= 2
+    identifiers._blocks.clear()
+    assert allocate() not in attempts
+
+
+def test_identifier_reservation_in_transaction(db):
+    identifiers._blocks.clear()
+    name = "purchase_order.po_number.12"
+
+    # the test transaction could roll a block back, so only what is used is reserved
+    first = identifiers.allocate_identifiers(PurchaseOrder, "po_number", 3, 12)
+    assert IdentifierSequence.objects.get(name=name).next_value == 3
+    assert name not in identifiers._blocks
+    assert identifiers.allocate_identifiers(PurchaseOrder, "po_number", 1, 12)[0] not in first
+
+
+@pytest.mark.django_db(transaction=True)
+@override_settings(IDENTIFIER_BLOCK_SIZE=10)
+def test_identifier_block_reserved_outside_transaction():
+    identifiers._blocks.clear()
+    name = "purchase_order.po_number.12"
+
+    numbers = identifiers.allocate_identifiers(PurchaseOrder, "po_number", 2, 12)
+    assert IdentifierSequence.objects.get(name=name).next_value == 10
+    with CaptureQueriesContext(connection) as context:
+        numbers += identifiers.allocate_identifiers(PurchaseOrder, "po_number", 8, 12)
+    assert not context.captured_queries
+    assert len(set(numbers)) == 10
+    identifiers._blocks.clear()
+
+
+def test_po_status_transition(vendor_auth_client, vendor):
+    buyer_user = User.objects.create(username="po-buyer", mobile="08000000000")
+    create_pos(vendor, buyer_user, 6)
+    ids = [str(pk) for pk in PurchaseOrder.objects.order_by("po_number").values_list("id", flat=True)]
+    url = "/api/v1/purchase_orders/transition/"
+
+    def transition_query_count(pks, target):
+        with CaptureQueriesContext(connection) as context:
+            response = vendor_auth_client.post(url, {"ids": pks, "status": target}, format="json")
+        assert response.status_code == status.HTTP_200_OK, response.data
+        assert sorted(map(str, response.data["data"]["updated"])) == sorted(pks)
+        return len(context.captured_queries)
+
+    assert transition_query_count(ids[:1], "cancelled") == transition_query_count(ids[1:5], "cancelled")
+    assert transition_query_count(ids[:2], "pending") == transition_query_count(ids[2:5], "pending")
+
+    unknown = "00000000-0000-0000-0000-000000000000"
+    before = PurchaseOrder.objects.get(id=ids[5]).updated_at
+    response = vendor_auth_client.post(url, {"ids": ids + [unknown], "status": "completed"}, format="json")
+    assert len(response.data["data"]["updated"]) == 6
+    response = vendor_auth_client.post(url, {"ids": ids[:2] + [unknown], "status": "cancelled"}, format="json")
+    assert response.data["data"]["updated"] == []
+    assert list(map(str, response.data["data"]["skipped"])) == ids[:2] + [unknown]
+
+    assert set(PurchaseOrder.objects.values_list("status", flat=True)) == {"completed"}
+    assert PurchaseOrder.objects.get(id=ids[5]).updated_at > before
+    accumulator = VendorMetricAccumulator.objects.get(vendor=vendor)
+    assert accumulator.total_po_count == 6 and accumulator.completed_count == 6
+    assert vendor_auth_client.get("/api/v1/purchase_orders/", {"status": "completed"}).data["data"]["total"] == 6
+
+    response = vendor_auth_client.post(url, {"ids": ids, "status": "shipped"}, format="json")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    # updating a single purchase order follows the same transitions once enforced
+    detail = f"/api/v1/purchase_orders/{ids[0]}/"
+    payload = {"delivery_date": "2026-01-01T10:00:00Z", "status": "pending"}
+    with override_settings(PO_ENFORCE_STATUS_TRANSITIONS=True):
+        response = vendor_auth_client.put(detail, payload, format="json")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        response = vendor_auth_client.put(detail, {"delivery_date": "2026-01-01T10:00:00Z"}, format="json")
+        assert response.status_code == status.HTTP_200_OK and response.data["data"]["status"] == "completed"
+    response = vendor_auth_client.put(detail, payload, format="json")
+    assert response.status_code == status.HTTP_200_OK and response.data["data"]["status"] == "pending"
+
+
+def test_po_transition_scoped_to_principal(vendor_auth_client, vendor):
+    buyer_user = User.objects.create(username="po-buyer", mobile="08000000000")
+    other_user = User.objects.create(username="po-vendor", mobile="08000000001")
+    other_vendor = VendorProfile.objects.create(user=other_user, business_name="Other vendor")
+    po = PurchaseOrder.objects.create(
+        vendor=other_vendor, buyer=buyer_user, po_number="200000000001", delivery_date=timezone.now()
+    )
+    url = "/api/v1/purchase_orders/transition/"
+
+    for query in ("", f"?vendor_id={other_vendor.id}"):
+        response = vendor_auth_client.post(url + query, {"ids": [str(po.id)], "status": "cancelled"}, format="json")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["data"]["updated"] == []
+        assert list(map(str, response.data["data"]["skipped"])) == [str(po.id)]
+    po.refresh_from_db()
+    assert po.status == "pending"
+
+
+def test_po_update_optimistic_locking(buyer_auth_client, buyer):
+    vendor_user = User.objects.create(username="po-vendor", mobile="08000000001")
+    vendor = VendorProfile.objects.create(user=vendor_user, business_name="PO vendor")
+    po = PurchaseOrder.objects.create(vendor=vendor, po_number="200000000001", delivery_date=timezone.now())
+    order_date = PurchaseOrder.objects.get(pk=po.pk).order_date
+    url = f"/api/v1/purchase_orders/{po.pk}/"
+    payload = {"delivery_date": "2026-01-01T10:00:00Z", "quality_rating": 4.0, "status": "completed"}
+
+    etag = buyer_auth_client.get(url)["ETag"]
+    response = buyer_auth_client.put(url, payload, format="json", HTTP_IF_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK, response.data
+    assert response.data["data"]["version"] == 2 and response.data["data"]["status"] == "completed"
+    assert PurchaseOrder.objects.get(pk=po.pk).order_date == order_date
+    assert response["ETag"] != etag and response["ETag"] == buyer_auth_client.get(url)["ETag"]
+
+    # the same edit based on the representation before is refused
+    response = buyer_auth_client.put(url, {**payload, "quality_rating": 1.0}, format="json", HTTP_IF_MATCH=etag)
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+    assert PurchaseOrder.objects.get(pk=po.pk).quality_rating == 4.0
+
+    # the ETag follows the purchase order, not the representation it was read in
+    etag = buyer_auth_client.get(url, {"fields": "po_number,status"})["ETag"]
+    response = buyer_auth_client.put(url, {**payload, "quality_rating": 4.5}, format="json", HTTP_IF_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK, response.data
+    assert response.data["data"]["version"] == 3
+
+    first, second = PurchaseOrder.objects.get(pk=po.pk), PurchaseOrder.objects.get(pk=po.pk)
+    PurchaseOrderFormSerializer().update(first, {"quality_rating": 3.0})
+    with pytest.raises(VersionConflict):
+        PurchaseOrderFormSerializer().update(second, {"quality_rating": 5.0})
+    assert PurchaseOrder.objects.values_list("quality_rating", "version").get(pk=po.pk) == (3.0, 4)
@@ -140,3 +140,13 @@ def test_list_all_users(vendor_auth_client):
     response = vendor_auth_client.get(f"/api/v1/users/")
     assert response.status_code == status.HTTP_200_OK
 
+
+
+def test_principal_resolved_in_one_query(vendor_auth_client, django_assert_num_queries):
+    # one query resolves the caller, the other counts their purchase orders
+    with django_assert_num_queries(2):
+        response = vendor_auth_client.get(f"/api/v1/vendors/purchase-order/")
+    assert response.status_code == status.HTTP_200_OK
+
+    response = vendor_auth_client.get(f"/api/v1/buyers/profile/")
+    assert response.status_code == status.HTTP_403_FORBIDDEN
@@ -0,0 +1,364 @@
+from datetime import date, datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+
+from apps.purchase_orders.models import PurchaseOrder
+from apps.users.analytics import vendor_performance_metrics
+from apps.users.cache import get_vendor_metrics
+from apps.users.metrics import empty_totals, metrics_from_totals
+from apps.users.models import (
+    VendorHistoricalPerformance,
+    VendorMetricAccumulator,
+    VendorMetricCheckpoint,
+    VendorMetricsQueue,
+    VendorPerformanceRollup,
+    VendorProfile,
+)
+from apps.users.serializer import VendorFormSerializer
+from apps.utils.counting import COUNT_VERSION_KEY
+from apps.utils.enums import POStatusEnum
+
+
+def create_po(vendor, buyer, po_number, **kwargs):
+    now = timezone.now()
+    data = dict(
+        vendor=vendor,
+        buyer=buyer.user,
+        po_number=po_number,
+        delivery_date=now + timedelta(days=3),
+        issue_date=now - timedelta(days=2),
+    )
+    data.update(kwargs)
+    return PurchaseOrder.objects.create(**data)
+
+
+def test_accumulator_tracks_status_transitions(vendor, buyer):
+    now = timezone.now()
+    po = create_po(vendor, buyer, "100000000001", quality_rating=4.0, acknowledgment_date=now)
+    create_po(vendor, buyer, "100000000002")
+
+    accumulator = VendorMetricAccumulator.objects.get(vendor=vendor)
+    assert accumulator.total_po_count == 2
+    assert accumulator.completed_count == 0
+
+    po.status = POStatusEnum.COMPLETED
+    po.save()
+    accumulator.refresh_from_db()
+    assert accumulator.completed_count == 1
+    assert accumulator.on_time_count == 1
+    assert accumulator.metrics == vendor.aggregate_performance_metrics
+
+    po.delete()
+    accumulator.refresh_from_db()
+    assert accumulator.total_po_count == 1
+    assert accumulator.completed_count == 0
+    assert accumulator.quality_rating_sum == 0
+
+
+def test_rebuild_vendor_metrics_command(vendor, buyer):
+    now = timezone.now()
+    create_po(
+        vendor, buyer, "100000000001",
+        status=POStatusEnum.COMPLETED, quality_rating=3.0, acknowledgment_date=now,
+    )
+    create_po(
+        vendor, buyer, "100000000002",
+        status=POStatusEnum.COMPLETED, quality_rating=4.0,
+        delivery_date=now + timedelta(days=30),
+    )
+    create_po(vendor, buyer, "100000000003")
+    expected = VendorMetricAccumulator.objects.get(vendor=vendor).totals
+
+    VendorMetricAccumulator.objects.filter(vendor=vendor).update(completed_count=42)
+    call_command("rebuild_vendor_metrics")
+
+    accumulator = VendorMetricAccumulator.objects.get(vendor=vendor)
+    assert accumulator.totals == expected
+    assert accumulator.metrics == vendor.aggregate_performance_metrics
+
+
+def test_performance_metrics_single_query(vendor, buyer, django_assert_num_queries):
+    now = timezone.now()
+    create_po(
+        vendor, buyer, "100000000001",
+        status=POStatusEnum.COMPLETED, quality_rating=3.0, acknowledgment_date=now,
+    )
+    create_po(vendor, buyer, "100000000002")
+
+    with django_assert_num_queries(1):
+        metrics = vendor.aggregate_performance_metrics
+    assert metrics == {
+        "on_time_delivery_rate": 100.0,
+        "quality_rating_avg": 3.0,
+        "average_response_time": 2.0,
+        "fulfillment_rate": 50.0,
+    }
+
+    with django_assert_num_queries(1):
+        bulk_metrics = VendorProfile.bulk_performance_metrics([vendor.id])
+    assert bulk_metrics == {vendor.id: metrics}
+
+
+def test_vendor_performance_endpoint(vendor_auth_client, vendor):
+    response = vendor_auth_client.get(f"/api/v1/vendors/{vendor.id}/performance/")
+    assert response.status_code == 200
+    assert response.data["data"]["fulfillment_rate"] == 0
+    assert response.data["data"]["vendor"]["id"] == str(vendor.id)
+
+
+def test_profile_metrics_read_from_accumulator(vendor_auth_client, vendor, buyer, django_assert_num_queries):
+    create_po(vendor, buyer, "100000000001", status=POStatusEnum.COMPLETED, quality_rating=4.0)
+    create_po(vendor, buyer, "100000000002")
+    accumulator = VendorMetricAccumulator.objects.get(vendor=vendor)
+    assert vendor.calculate_performance_metrics == accumulator.metrics == vendor.aggregate_performance_metrics
+
+    # the purchase order table is not aggregated on a cache miss
+    cache.clear()
+    with django_assert_num_queries(1):
+        vendor.calculate_performance_metrics
+    response = vendor_auth_client.get("/api/v1/vendors/profile/")
+    assert response.status_code == 200
+    assert {field: response.data["data"][field] for field in accumulator.metrics} == accumulator.metrics
+
+
+def test_vendor_performance_leaderboard(vendor_auth_client, vendor, buyer):
+    now = timezone.now()
+    create_po(
+        vendor, buyer, "100000000001",
+        status=POStatusEnum.COMPLETED, quality_rating=4.5, acknowledgment_date=now,
+    )
+    create_po(vendor, buyer, "100000000002")
+    idle_vendor = VendorProfile.objects.create(business_name="Idle vendor")
+
+    response = vendor_auth_client.get("/api/v1/vendors/performance/", {"ordering": "-quality_rating_avg"})
+    assert response.status_code == 200
+    results = response.data["data"]["results"]
+    assert [r["id"] for r in results] == [str(vendor.id), str(idle_vendor.id)]
+    assert results[0]["quality_rating_avg"] == 4.5
+    assert results[0]["fulfillment_rate"] == 50.0
+    assert results[1]["total_po_count"] == 0
+
+    response = vendor_auth_client.get("/api/v1/vendors/performance/", {"min_pos": 1})
+    assert [r["id"] for r in response.data["data"]["results"]] == [str(vendor.id)]
+
+    response = vendor_auth_client.get("/api/v1/vendors/performance/", {"ordering": "business_name"})
+    assert response.status_code == 400
+
+
+def test_metrics_queue_coalesces_updates(vendor, buyer):
+    po = create_po(vendor, buyer, "100000000001", status=POStatusEnum.COMPLETED, quality_rating=2.0)
+    po.quality_rating = 5.0
+    po.save()
+    create_po(vendor, buyer, "100000000002", status=POStatusEnum.COMPLETED, quality_rating=5.0)
+
+    assert VendorMetricsQueue.objects.filter(vendor=vendor).count() == 1
+    assert not VendorHistoricalPerformance.objects.filter(vendor=vendor).exists()
+
+    call_command("process_vendor_metrics", "--once", "--window=0")
+
+    assert not VendorMetricsQueue.objects.exists()
+    history = VendorHistoricalPerformance.objects.get(vendor=vendor)
+    assert history.quality_rating_avg == 5.0
+    assert history.fulfillment_rate == 100.0
+
+
+def test_performance_history_rollups(vendor_auth_client, vendor):
+    metrics = {
+        "on_time_delivery_rate": 50.0,
+        "quality_rating_avg": 4.0,
+        "average_response_time": 1.0,
+        "fulfillment_rate": 100.0,
+    }
+    VendorHistoricalPerformance.record(vendor.id, metrics, date=datetime(2024, 5, 6, 9, tzinfo=dt_timezone.utc))
+    VendorHistoricalPerformance.record(
+        vendor.id, dict(metrics, quality_rating_avg=2.0), date=datetime(2024, 5, 8, 9, tzinfo=dt_timezone.utc)
+    )
+    VendorHistoricalPerformance.record(vendor.id, metrics, date=datetime(2024, 6, 3, 9, tzinfo=dt_timezone.utc))
+    endpoint = f"/api/v1/vendors/{vendor.id}/performance/history/"
+
+    response = vendor_auth_client.get(endpoint, {"resolution": "week", "from": "2024-05-01", "to": "2024-05-31"})
+    assert response.status_code == 200
+    assert [(r["date"], r["sample_count"], r["quality_rating_avg"]) for r in response.data["data"]] == [
+        ("2024-05-06", 2, 3.0)
+    ]
+
+    response = vendor_auth_client.get(endpoint, {"resolution": "month"})
+    assert [r["date"] for r in response.data["data"]] == ["2024-05-01", "2024-06-01"]
+
+    response = vendor_auth_client.get(endpoint, {"from": "2024-05-07", "to": "2024-06-03"})
+    assert [r["quality_rating_avg"] for r in response.data["data"]] == [2.0, 4.0]
+
+    VendorPerformanceRollup.objects.all().delete()
+    VendorPerformanceRollup.rebuild()
+    assert VendorPerformanceRollup.objects.filter(resolution="day").count() == 3
+    assert VendorPerformanceRollup.objects.get(resolution="month", bucket=date(2024, 5, 1)).sample_count == 2
+
+    response = vendor_auth_client.get(endpoint, {"resolution": "year"})
+    assert response.status_code == 400
+
+
+def test_snapshots_only_written_on_change(vendor, buyer):
+    po = create_po(vendor, buyer, "100000000001", status=POStatusEnum.COMPLETED, quality_rating=4.0)
+    call_command("process_vendor_metrics", "--once", "--window=0")
+    assert VendorHistoricalPerformance.objects.filter(vendor=vendor).count() == 1
+
+    po.quantity = 5
+    po.save()
+    assert not VendorMetricsQueue.objects.exists()
+
+    VendorMetricsQueue.mark_dirty([vendor.id])
+    call_command("process_vendor_metrics", "--once", "--window=0")
+    assert VendorHistoricalPerformance.objects.filter(vendor=vendor).count() == 1
+
+    # a transition leaving the metrics as they were is still snapshotted
+    other = create_po(vendor, buyer, "100000000002")
+    call_command("process_vendor_metrics", "--once", "--window=0")
+    count = VendorHistoricalPerformance.objects.filter(vendor=vendor).count()
+    other.status = POStatusEnum.CANCELLED
+    other.save()
+    assert VendorMetricsQueue.objects.get(vendor=vendor).status_changed
+    call_command("process_vendor_metrics", "--once", "--window=0")
+    assert VendorHistoricalPerformance.objects.filter(vendor=vendor).count() == count + 1
+
+
+def test_compact_vendor_history(vendor):
+    metrics = {
+        "on_time_delivery_rate": 50.0,
+        "quality_rating_avg": 4.0,
+        "average_response_time": 1.0,
+        "fulfillment_rate": 100.0,
+    }
+    now = timezone.now()
+    for days_ago, quality in [(400, 1.0), (5, 4.0), (4, 4.0), (3, 3.0), (2, 4.0), (1, 4.0)]:
+        VendorHistoricalPerformance.record(
+            vendor.id, dict(metrics, quality_rating_avg=quality), date=now - timedelta(days=days_ago)
+        )
+
+    call_command("compact_vendor_history", "--keep-days=365", "--batch-size=2")
+
+    history = VendorHistoricalPerformance.objects.filter(vendor=vendor).order_by("date")
+    assert [h.quality_rating_avg for h in history] == [4.0, 3.0, 4.0]
+    assert VendorPerformanceRollup.objects.filter(vendor=vendor, resolution="day").count() == 6
+
+
+def test_backfill_vendor_history(vendor, buyer, tmp_path):
+    create_po(vendor, buyer, "100000000001", status=POStatusEnum.COMPLETED, quality_rating=4.0)
+    create_po(vendor, buyer, "100000000002")
+    create_po(vendor, buyer, "100000000003", status=POStatusEnum.COMPLETED, quality_rating=2.0)
+    VendorHistoricalPerformance.record(vendor.id, VendorMetricAccumulator.for_vendor(vendor.id).metrics)
+    progress_file = tmp_path / "progress"
+
+    call_command("backfill_vendor_history", "--workers=1", f"--progress-file={progress_file}")
+
+    history = VendorHistoricalPerformance.objects.filter(vendor=vendor).order_by("date")
+    assert [(h.quality_rating_avg, h.fulfillment_rate) for h in history] == [(4.0, 100.0), (3.0, 66.67)]
+    assert VendorPerformanceRollup.objects.get(vendor=vendor, resolution="day").sample_count == 2
+    assert progress_file.read_text().split() == [str(vendor.id)]
+
+    VendorHistoricalPerformance.objects.all().delete()
+    call_command("backfill_vendor_history", "--workers=1", "--resume", f"--progress-file={progress_file}")
+    assert not VendorHistoricalPerformance.objects.exists()
+
+
+def test_vendor_metrics_cache_invalidation(vendor, buyer, django_assert_num_queries):
+    po = create_po(vendor, buyer, "100000000001", status=POStatusEnum.COMPLETED, quality_rating=4.0)
+
+    assert get_vendor_metrics(vendor)["quality_rating_avg"] == 4.0
+    with django_assert_num_queries(0):
+        assert get_vendor_metrics(vendor)["quality_rating_avg"] == 4.0
+
+    po.quality_rating = 2.0
+    po.save()
+    assert get_vendor_metrics(vendor)["quality_rating_avg"] == 2.0
+
+    po.delete()
+    assert get_vendor_metrics(vendor)["fulfillment_rate"] == 0
+
+
+def test_vendor_form_update_invalidates_list_counts(vendor):
+    key = COUNT_VERSION_KEY.format(VendorProfile._meta.label)
+    version = cache.get(key, 0)
+    serializer = VendorFormSerializer(vendor, data={"settings": {"business_name": "Renamed vendor"}})
+    serializer.is_valid(raise_exception=True)
+    serializer.save()
+    assert cache.get(key, 0) > version
+
+
+def test_vendor_performance_as_of(vendor_auth_client, vendor, buyer):
+    create_po(vendor, buyer, "100000000001", status=POStatusEnum.COMPLETED, quality_rating=4.0)
+    create_po(vendor, buyer, "100000000002", status=POStatusEnum.COMPLETED, quality_rating=2.0)
+    checkpoints = VendorMetricCheckpoint.objects.filter(vendor=vendor).order_by("date")
+    assert [c.total_po_count for c in checkpoints] == [2]
+
+    for po_number, day in (("100000000001", 1), ("100000000002", 3)):
+        PurchaseOrder.objects.filter(po_number=po_number).update(
+            updated_at=datetime(2024, 5, day, 9, tzinfo=dt_timezone.utc)
+        )
+    VendorHistoricalPerformance.replay(vendor.id)
+    assert [c.total_po_count for c in checkpoints.all()] == [1, 2]
+    endpoint = f"/api/v1/vendors/{vendor.id}/performance/"
+
+    response = vendor_auth_client.get(endpoint, {"as_of": "2024-05-02"})
+    assert response.status_code == 200
+    assert response.data["data"]["quality_rating_avg"] == 4.0
+    assert response.data["data"]["fulfillment_rate"] == 100.0
+
+    response = vendor_auth_client.get(endpoint, {"as_of": "2024-04-30"})
+    assert response.status_code == 404
+
+    response = vendor_auth_client.get(endpoint)
+    assert response.data["data"]["quality_rating_avg"] == 3.0
+    assert "as_of" not in response.data["data"]
+
+    response = vendor_auth_client.get(endpoint, {"as_of": "yesterday"})
+    assert response.status_code == 400
+
+
+def test_compact_vendor_history_prunes_checkpoints(vendor, buyer):
+    for day, po_number in enumerate(("100000000001", "100000000002", "100000000003"), start=1):
+        create_po(vendor, buyer, po_number)
+        PurchaseOrder.objects.filter(po_number=po_number).update(
+            updated_at=timezone.now() - timedelta(days=30 - day)
+        )
+    VendorHistoricalPerformance.replay(vendor.id)
+    create_po(vendor, buyer, "100000000004")
+
+    call_command("compact_vendor_history", "--keep-days=7")
+
+    checkpoints = VendorMetricCheckpoint.objects.filter(vendor=vendor).order_by("date")
+    assert [c.total_po_count for c in checkpoints] == [3, 4]
+    as_of = timezone.now() - timedelta(days=10)
+    assert VendorMetricCheckpoint.metrics_as_of(vendor.id, as_of)["fulfillment_rate"] == 0
+    assert VendorMetricCheckpoint.metrics_as_of(vendor.id, as_of - timedelta(days=20)) is None
+
+
+def test_vectorized_metrics_match_orm(vendor, buyer):
+    now = timezone.now()
+    other_vendor = VendorProfile.objects.create(business_name="Other vendor")
+    idle_vendor = VendorProfile.objects.create(business_name="Idle vendor")
+    create_po(
+        vendor, buyer, "100000000001",
+        status=POStatusEnum.COMPLETED, quality_rating=4.5, acknowledgment_date=now,
+    )
+    create_po(
+        vendor, buyer, "100000000002",
+        status=POStatusEnum.COMPLETED, quality_rating=3.0, delivery_date=now + timedelta(days=30),
+    )
+    create_po(vendor, buyer, "100000000003")
+    create_po(
+        other_vendor, buyer, "100000000004",
+        status=POStatusEnum.COMPLETED, quality_rating=1.5,
+        issue_date=now - timedelta(days=5), acknowledgment_date=now,
+    )
+    vendor_ids = [vendor.id, other_vendor.id, idle_vendor.id]
+
+    metrics = vendor_performance_metrics(vendor_ids=vendor_ids, chunk_size=2)
+    assert metrics == {v.id: v.aggregate_performance_metrics for v in (vendor, other_vendor, idle_vendor)}
+    assert vendor_performance_metrics(chunk_size=3) == VendorProfile.bulk_performance_metrics(vendor_ids[:2])
+
+    assert vendor_performance_metrics(vendor_ids=[vendor.id], date_to=now - timedelta(days=1)) == {
+        vendor.id: metrics_from_totals(empty_totals())
+    }